@@ -1,7 +1,8 @@
 import asyncio
 import logging
-import re
-import base64
+from core.util.tts_scheduler import TTSBusyError
+from core.util.segmenter import Segmenter
+from core.util.bounded_queue import BoundedQueue
 
 
 class Character:
@@ -23,36 +24,38 @@ class Character:
             self.history.append(
                 {"role": "system", "content": self.system_prompt})
 
-        self.message_queue = asyncio.Queue()  # LLM 原始输出队列
-        self.sentence_queue = asyncio.Queue()  # TTS 句子队列
-        self.output_queue = asyncio.Queue()   # 处理完毕后的结果输出队列 (供外部消费)
+        # 各队列都有上限：下游（发送端 -> 编排器 -> TTS）跟不上时，上游的 put 会等待，
+        # 最终暂停读取 LLM 流，单个会话占用的内存因此有上限
+        shared_config = self.components.config if self.components else {}
+        queue_config = shared_config.get("queues", {})
+        self.message_queue = BoundedQueue(queue_config.get("message_items", 64))  # LLM 原始输出队列
+        self.sentence_queue = BoundedQueue(queue_config.get("sentence_items", 8))  # TTS 句子队列
+        # 已开始翻译的句子队列 (代次, 原句, 翻译任务)，容量即翻译预取窗口：
+        # 翻译提前于 TTS 进行，TTS 按入队顺序消费，播放顺序不变
+        lookahead = shared_config.get("components", {}).get("translator", {}).get("lookahead", 2)
+        self.translated_queue = BoundedQueue(max(1, lookahead))
+        # 处理完毕后的结果输出队列 (供外部消费)，同时按条数和音频字节数限制
+        self.output_queue = BoundedQueue(queue_config.get("output_items", 256),
+                                         max_bytes=queue_config.get("output_bytes", 1024 * 1024))
         
         self.current_chat_task = None  # 当前正在进行的 chat 任务
+        self._generation = 0  # 每次中断加一，用于丢弃中断前已开始翻译的句子
+        self.rank = 0  # 当前回复的演出序号，与句序一起作为 TTS 的播放截止顺序
+        self._sentence_index = 0
+
+        # 流式断句器，可替换为任何实现了 feed/flush/reset 的对象
+        self.segmenter = Segmenter(**shared_config.get("segmenter", {}))
 
         self.tasks = []
+        # TTS 模型由共享的 Components 在启动时统一注册，这里不再重复加载
         if self.components:
             self.start_tasks()
-            # 注册 TTS 角色
-            self._register_tts_character()
-            
-    def _register_tts_character(self):
-        """注册 TTS 角色信息"""
-        if not self.components or not hasattr(self.components.tts, 'register_character'):
-            return
-        
-        char_name = self.tts_config.get("character_name", self.name)
-        model_dir = self.tts_config.get("onnx_model_dir")
-        if char_name and model_dir:
-            try:
-                self.components.tts.register_character(char_name, model_dir)
-                logging.info(f"[{self.name}] TTS 角色 '{char_name}' 已注册")
-            except Exception as e:
-                logging.error(f"[{self.name}] 注册 TTS 角色失败: {e}")
 
     def start_tasks(self):
         """启动后台处理任务"""
         self.tasks = [
             asyncio.create_task(self._process_char_loop()),
+            asyncio.create_task(self._process_translate_loop()),
             asyncio.create_task(self._process_audio_loop())
         ]
 
@@ -69,7 +72,11 @@ class Character:
         self.tasks = []
 
     async def interrupt(self):
-        """中断当前角色的生成任务并清空队列"""
+        """
+        中断当前角色的生成任务并清空队列。
+        后台任务可能正阻塞在某个已满队列的 put 上，或拿着一项还没标记完成，
+        所以先停掉后台任务，清空队列后再重新启动，保证下一轮的 join() 计数干净。
+        """
         # 1. 取消正在进行的 chat 任务
         if self.current_chat_task and not self.current_chat_task.done():
             self.current_chat_task.cancel()
@@ -78,18 +85,69 @@ class Character:
             except asyncio.CancelledError:
                 pass
             self.current_chat_task = None
-        
-        # 2. 清空所有队列
-        for q in [self.message_queue, self.sentence_queue, self.output_queue]:
-            while not q.empty():
-                try:
-                    q.get_nowait()
-                    q.task_done()
-                except asyncio.QueueEmpty:
-                    break
+
+        # 2. 停止后台任务，清空所有队列
+        self._generation += 1
+        restart = bool(self.tasks)
+        await self.stop_tasks()
+        for _, _, translation in self.translated_queue.reset():
+            translation.cancel()
+        self.message_queue.reset()
+        self.sentence_queue.reset()
+        self.segmenter.reset()
+        # 编排器可能正拿着输出队列里的一项，这里逐项标记完成而不是直接清零计数
+        while not self.output_queue.empty():
+            self.output_queue.get_nowait()
+            self.output_queue.task_done()
+        # 告诉编排器这一代的输出到此为止：正在演出的台词随之结束，不会一直等待 end
+        self.output_queue.put_nowait({"type": "interrupted", "character": self.name,
+                                      "generation": self._generation - 1})
+
+        # 3. 被取消的 chat 不会走到 release，这里归还 TTS 资源锁，后面的角色不必等它超时
+        if self.components:
+            await self.components.tts_lock.force_release(self.name)
+
+        # 4. 重新启动后台任务
+        if restart:
+            self.start_tasks()
         
         logging.info(f"[{self.name}] 已中断并清空队列")
 
+    def queue_stats(self) -> dict:
+        """各处理队列当前的排队量与峰值"""
+        return {
+            "message": self.message_queue.stats(),
+            "sentence": self.sentence_queue.stats(),
+            "translated": self.translated_queue.stats(),
+            "output": self.output_queue.stats(),
+        }
+
+    @property
+    def generation(self) -> int:
+        """当前代次，每次中断加一；注册台词时记下，编排器据此识别作废的台词"""
+        return self._generation
+
+    async def start_chat(self, user_text: str, extra_context: str = "", rank: int = 0) -> asyncio.Task:
+        """
+        在后台开始一轮对话并记下任务，之后可以通过 interrupt 或 discard_chat 取消。
+        上一轮还没结束时先中断它并等待其退出，两轮对话不会同时操作队列和历史。
+        rank 是这轮回复的演出序号（越小越先播放），TTS 调度按它和句序排列合成任务。
+        """
+        if self.current_chat_task and not self.current_chat_task.done():
+            await self.interrupt()
+        self.rank = rank
+        self.current_chat_task = asyncio.create_task(self.chat(user_text, extra_context=extra_context))
+        return self.current_chat_task
+
+    async def discard_chat(self, history_length: int):
+        """
+        撤销一轮还没有演出的对话（投机启动未命中）：
+        中断生成（同时释放 TTS 资源锁），并把角色历史回滚到这轮开始之前的长度。
+        """
+        await self.interrupt()
+        del self.history[history_length:]
+        logging.info(f"[{self.name}] 已撤销投机启动的对话")
+
     def load_memory(self, memory: list):
         """加载历史记忆"""
         # 保留 system prompt
@@ -119,8 +177,9 @@ class Character:
             logging.error(f"[{self.name}] 无法开启对话：未绑定 Components")
             return
         
-        # 如果已有任务在运行，先中断
-        if self.current_chat_task and not self.current_chat_task.done():
+        # 如果已有任务在运行，先中断（经 start_chat 启动时记录的就是本任务自己）
+        current = asyncio.current_task()
+        if self.current_chat_task and self.current_chat_task is not current and not self.current_chat_task.done():
             self.current_chat_task.cancel()
             try:
                 await self.current_chat_task
@@ -130,54 +189,70 @@ class Character:
         # 提前申请 TTS 资源锁
         await self.components.tts_lock.reserve(self.name)
 
-        # 投递开始信号
-        await self.output_queue.put({"type": "start", "character": self.name})
-        logging.info(f"[{self.name}] 成功收到并开始处理: {user_text}")
-
-        # 添加用户历史
-        self.add_history_user(user_text)
-
-        # 构造 LLM 输入：系统提示 + 额外上下文 + 角色历史（额外上下文临时，不存储）
-        messages = self.history.copy()
-        if extra_context:
-            # 将 extra_context 作为 system 消息插入到人设之后（第2位）
-            messages.insert(1, {"role": "system", "content": f"[当前情境] {extra_context}"})
-
-        full_response = ""
-        # 流式调用 LLM
-        async for response in self.components.llm.generate(messages):
-            full_response += response
-            await self.message_queue.put(response)
-
-        # 更新助手历史
-        self.add_history_assistant(full_response)
-
-        # 等待后台处理队列全部完成（消费完毕）
-        await self.message_queue.join()
-        await self.sentence_queue.join()
-
-        # 投递结束信号
-        await self.output_queue.put({"type": "end", "character": self.name})
-        
-        # 清除当前任务引用
-        self.current_chat_task = None
-
-        # 释放TTS资源锁
-        await self.components.tts_lock.release(self.name)
+        try:
+            # 投递开始信号
+            await self._put_output({"type": "start", "character": self.name})
+            logging.info(f"[{self.name}] 成功收到并开始处理: {user_text}")
+
+            # 添加用户历史
+            self.add_history_user(user_text)
+
+            # 构造 LLM 输入：系统提示 + 额外上下文 + 角色历史（额外上下文临时，不存储）
+            messages = self.history.copy()
+            if extra_context:
+                # 将 extra_context 作为 system 消息插入到人设之后（第2位）
+                messages.insert(1, {"role": "system", "content": f"[当前情境] {extra_context}"})
+
+            full_response = ""
+            # 流式调用 LLM
+            async for response in self.components.llm.generate(messages):
+                full_response += response
+                await self.message_queue.put(response)
+            # 回复结束标记：让断句器把没有以句末标点结尾的剩余文本也送去合成
+            await self.message_queue.put(None)
+
+            # 更新助手历史
+            self.add_history_assistant(full_response)
+
+            # 等待后台处理队列全部完成（消费完毕）
+            await self.message_queue.join()
+            await self.sentence_queue.join()
+
+            # 投递结束信号
+            await self._put_output({"type": "end", "character": self.name})
+
+            # 清除当前任务引用
+            if self.current_chat_task is current:
+                self.current_chat_task = None
+        finally:
+            # 释放TTS资源锁：出错或被取消时也要释放，排在队首、还没 acquire 的角色不受超时清理
+            await self.components.tts_lock.release(self.name)
         logging.info(f"[{self.name}] 对话推理与后处理已全部完成")
 
     async def _process_char_loop(self):
         """
-        后台处理循环：处理字符队列 -> 过滤 -> 投递到 output_queue -> 组合句子发送至音频队列
+        后台处理循环：处理字符队列 -> 过滤 -> 投递到 output_queue -> 经断句器组合句子发送至句子队列
+        收到 None（一轮回复结束）时把断句器中的剩余文本作为最后一句送出。
         """
-        buffer = ""
         is_thinking = False
-        sentence_endings = re.compile(r'[。！？.!?\n]+')
+        generation = self._generation
 
         while True:
             try:
                 char = await self.message_queue.get()
 
+                # 被打断过：丢弃断句器里上一轮的残留
+                if generation != self._generation:
+                    generation = self._generation
+                    self.segmenter.reset()
+                    is_thinking = False
+
+                if char is None:
+                    for sentence in self.segmenter.flush():
+                        await self.sentence_queue.put(sentence)
+                    self.message_queue.task_done()
+                    continue
+
                 # 思维链标签处理
                 if "<think>" in char:
                     is_thinking = True
@@ -194,7 +269,7 @@ class Character:
 
                 # 投递文本片段到外部输出队列
                 msg_type = "thinkText" if is_thinking else "text"
-                await self.output_queue.put({
+                await self._put_output({
                     "type": msg_type,
                     "data": char,
                     "character": self.name
@@ -202,12 +277,8 @@ class Character:
 
                 # 非思考模式下进行断句
                 if not is_thinking:
-                    buffer += char
-                    if sentence_endings.search(char):
-                        sentence = buffer.strip()
-                        if sentence:
-                            await self.sentence_queue.put(sentence)
-                        buffer = ""
+                    for sentence in self.segmenter.feed(char):
+                        await self.sentence_queue.put(sentence)
 
                 self.message_queue.task_done()
             except asyncio.CancelledError:
@@ -220,51 +291,95 @@ class Character:
                 except Exception:
                     pass
 
-    async def _process_audio_loop(self):
+    async def _process_translate_loop(self):
         """
-        后台处理循环：处理句子队列 -> 翻译 -> TTS -> 投递音频分片到 output_queue
+        后台处理循环：处理句子队列 -> 提交翻译 -> 投递到 translated_queue
+        不等待翻译完成就处理下一句，translated_queue 满时暂停，因此最多提前翻译 lookahead 句。
+        句子的 task_done 由音频循环在 TTS 完成后标记，chat() 的 join 依然等到语音全部产出。
         """
         while True:
             try:
                 sentence = await self.sentence_queue.get()
-                loop = asyncio.get_event_loop()
-
-                # 1. 翻译成日语
-                ja_sentence = await loop.run_in_executor(None, self.components.translator.translate, sentence)
+                generation = self._generation
+                translation = asyncio.ensure_future(self.components.translator.atranslate(sentence))
+                await self.translated_queue.put((generation, sentence, translation))
+            except asyncio.CancelledError:
+                break
 
-                # 2. 获取 TTS 资源锁
-                await self.components.tts_lock.acquire(self.name)
+    async def _process_audio_loop(self):
+        """
+        后台处理循环：按顺序取出翻译任务 -> 等待译文 -> TTS -> 投递音频分片到 output_queue
+        TTS 是流式的：每合成出一段音频就立即投递，不必等整句合成完。
+        """
+        while True:
+            try:
+                generation, sentence, translation = await self.translated_queue.get()
                 try:
-                    # 调用 TTS 生成音频
-                    audio_data = await loop.run_in_executor(
-                        None,
-                        lambda: self.components.tts.generate_audio(
-                            ja_sentence, **self.tts_config)
-                    )
+                    # 中断前提交的句子直接丢弃
+                    if generation != self._generation:
+                        translation.cancel()
+                        continue
+
+                    # 1. 等待译文（通常在上一句合成期间已经翻译好）
+                    ja_sentence = await translation
+
+                    # 2. 获取 TTS 资源锁（未启用时不阻塞，由调度器按播放顺序排队）
+                    await self.components.tts_lock.acquire(self.name)
+                    try:
+                        # 3. 流式调用 TTS（经进程级调度器按 (演出序号, 句序) 排队），每段音频封装为一个可独立播放的 WAV 投递
+                        self._sentence_index += 1
+                        stream = self.components.tts.stream(
+                            ja_sentence, self.components.session_id,
+                            priority=(self.rank, self._sentence_index), **self.tts_config)
+                        # 同一句的各段共用一个编码上下文，降采样滤波跨段衔接
+                        encoder = self.components.audio_encoder.stream()
+                        try:
+                            async for pcm, sample_rate in stream:
+                                # 合成途中被打断：后面的音频不再投递
+                                if generation != self._generation:
+                                    break
+                                await self._put_audio(encoder.encode(pcm, sample_rate))
+                        finally:
+                            await stream.aclose()
+                    except TTSBusyError as e:
+                        # 过载时降级：这一句只出文字不出声
+                        logging.warning(f"[{self.name}] {e}，本句跳过语音")
                 finally:
-                    pass
-
-                # 3. 如果有音频，分片投递到输出队列
-                if audio_data:
-                    CHUNK_SIZE = 30 * 1024
-                    total_len = len(audio_data)
-                    for i in range(0, total_len, CHUNK_SIZE):
-                        chunk_data = audio_data[i:i + CHUNK_SIZE]
-                        chunk_b64 = base64.b64encode(chunk_data).decode()
-                        await self.output_queue.put({
-                            "type": "audio",
-                            "data": chunk_b64,
-                            "is_final": (i + CHUNK_SIZE >= total_len),
-                            "character": self.name
-                        })
-
-                self.sentence_queue.task_done()
+                    # 无论成功、丢弃还是异常都要标记完成，避免 join() 永远等待
+                    self.translated_queue.task_done()
+                    self.sentence_queue.task_done()
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logging.error(f"[{self.name}] 音频处理循环异常: {e!r}")
-                # 确保异常时也能标记任务完成，避免 join() 永远等待
-                try:
-                    self.sentence_queue.task_done()
-                except Exception:
-                    pass
+
+    async def _put_output(self, item: dict):
+        """
+        投递到 output_queue。队列已满时要等前面的角色演出（背压），
+        等待期间暂停 TTS 资源锁的超时计时，避免持有者因此被当成出错而强制移出。
+        """
+        if not self.output_queue.full():
+            self.output_queue.put_nowait(item)
+            return
+        lock = self.components.tts_lock
+        lock.pause(self.name)
+        try:
+            await self.output_queue.put(item)
+        finally:
+            lock.resume(self.name)
+
+    async def _put_audio(self, audio_data: bytes):
+        """
+        把一段完整音频按传输大小切片投递，最后一片标记 is_final，前端据此拼回一个可播放单元。
+        切片用 memoryview，不拷贝；编码（二进制帧或 Base64）由发送端按连接协议决定。
+        """
+        CHUNK_SIZE = 30 * 1024
+        view = memoryview(audio_data)
+        total_len = len(view)
+        for i in range(0, total_len, CHUNK_SIZE):
+            await self._put_output({
+                "type": "audio",
+                "data": view[i:i + CHUNK_SIZE],
+                "is_final": (i + CHUNK_SIZE >= total_len),
+                "character": self.name
+            })
@@ -1,9 +1,30 @@
 ﻿import logging
 import json
 import asyncio
+import functools
+import re
+import time
+import unicodedata
 from typing import List, Dict, Optional
 from core.Script import Script
 
+# 拉丁字母（含带变音符号的字母）和数字，用于判断别名是否出现在单词内部
+_LATIN_WORD_CHARS = "0-9a-z\u00c0-\u024f"
+
+
+@functools.lru_cache(maxsize=256)
+def _mention_pattern(alias: str) -> re.Pattern:
+    """
+    别名的匹配模式（对小写后的用户输入使用）。
+    由拉丁字母组成的别名要求前后不是字母或数字，避免 "Al" 误中 "also"；
+    中日文别名没有词边界，仍按子串匹配。
+    """
+    escaped = re.escape(alias.lower())
+    if re.fullmatch(f"[{_LATIN_WORD_CHARS} .'-]+", alias.lower()):
+        return re.compile(f"(?<![{_LATIN_WORD_CHARS}]){escaped}(?![{_LATIN_WORD_CHARS}])")
+    return re.compile(escaped)
+
+
 class Director:
     """
     导演类，负责统筹剧本演进、维护公共记忆，并进行意图识别和任务分发。
@@ -11,12 +32,31 @@ class Director:
     """
     def __init__(self, components):
         self.script = Script(world_view=components.config.get("world_view", "这是一个虚拟人物互动的世界。"))
-        self.intent_llm = components.llm  # 默认使用配置中的 LLM 进行意图识别
+        self.components = components
+
+        # 角色名及别名，用户点名时不必询问 LLM
+        self.aliases = {
+            conf.get("name"): [conf.get("name"), *(conf.get("aliases") or [])]
+            for conf in components.config.get("characters", []) or []
+        }
+        router_config = components.config.get("router", {})
+        self.router_max_tokens = router_config.get("max_tokens", 32)
+        self.route_cache_ttl = router_config.get("cache_ttl", 60)
+        # 需要询问 LLM 时，先让预测的角色开始生成，输出等路由确认后才演出
+        self.speculative = router_config.get("speculative", True)
+        self.last_speaker = None  # 最近一位演出完成的角色，作为投机启动的预测对象
+        self._rank = 0  # 演出序号，越小越先播放
+
+        # 文本增量合并：窗口内连续的 text/thinkText 合成一帧发送，减少小帧和序列化次数
+        coalesce_config = components.config.get("text_coalesce", {})
+        self.coalesce_window = coalesce_config.get("window_ms", 40) / 1000
+        self.coalesce_max_chars = coalesce_config.get("max_chars", 64)
 
-    async def run_orchestrator(self, websocket, characters: Dict):
+    async def run_orchestrator(self, connection, characters: Dict):
         """
         演出编排循环：
         不断从剧本的台词队列中提取任务，并将对应角色的输出流转发给前端。
+        connection 负责按协商好的协议（JSON 或二进制音频帧）序列化发送。
         """
         while True:
             try:
@@ -30,14 +70,30 @@ class Director:
                     self.script.line_queue.task_done()
                     continue
 
+                # 角色在这句台词开始演出前已被打断，台词作废
+                generation = line_info.get("generation")
+                if generation is not None and generation != character.generation:
+                    logging.info(f"[Director] 跳过已被打断的台词: {char_name}")
+                    self.script.line_queue.task_done()
+                    continue
+
                 logging.info(f"[Director] --- 调度角色输出: {char_name} ---")
 
-                # 2. 独占式转发该角色的 output_queue 直到收到 end 信号
+                # 2. 独占式转发该角色的 output_queue 直到收到 end 信号（或本轮被打断）
+                pending = None
                 while True:
-                    item = await character.output_queue.get()
+                    item, pending = await self._next_frame(character.output_queue, pending)
+
+                    # 打断标记：属于正在演出的这轮回复时放弃这句台词，否则是更早的残留，直接丢弃
+                    if item.get("type") == "interrupted":
+                        character.output_queue.task_done()
+                        if generation is None or item.get("generation") == generation:
+                            logging.info(f"[Director] --- 角色 {char_name} 的输出已被打断 ---")
+                            break
+                        continue
                     
                     try:
-                        await websocket.send_text(json.dumps(item))
+                        await connection.send(item)
                     except Exception as e:
                         logging.error(f"[Director] 消息发送失败: {e}")
                         break
@@ -47,6 +103,7 @@ class Director:
                     # 3. 如果是 end 信号，表示该角色本次发言结束
                     if item.get("type") == "end":
                         logging.info(f"[Director] --- 角色 {char_name} 输出调度完成 ---")
+                        self.last_speaker = char_name
                         
                         # 将角色回复记入公共历史（从角色历史里偷最后一条）
                         if character.history:
@@ -67,6 +124,45 @@ class Director:
                 logging.error(f"[Director] 演出编排器异常: {e}")
                 await asyncio.sleep(1)
 
+    async def _next_frame(self, queue: asyncio.Queue, pending: Optional[Dict]):
+        """
+        取出下一帧，返回 (要发送的项, 下次优先处理的项)。
+        连续的同类文本增量在 coalesce_window 内、不超过 coalesce_max_chars 时合并为一帧；
+        遇到其他类型的项就提前结束合并，把它留给下一次。
+        返回的项由调用方在发送后 task_done，被合并进来的项在这里直接 task_done。
+        """
+        item = pending if pending is not None else await queue.get()
+        if item.get("type") not in ("text", "thinkText") or self.coalesce_window <= 0:
+            return item, None
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.coalesce_window
+        parts = [item["data"]]
+        size = len(item["data"])
+        following = None
+        while size < self.coalesce_max_chars:
+            if queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    following = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                following = queue.get_nowait()
+
+            if following.get("type") != item["type"]:
+                break
+            parts.append(following["data"])
+            size += len(following["data"])
+            queue.task_done()
+            following = None
+
+        if len(parts) > 1:
+            item = dict(item, data="".join(parts))
+        return item, following
+
     async def remove_from_queue(self, character_name: str):
         """从台词队列中移除指定角色的待演出任务"""
         # asyncio.Queue 不支持直接删除，需要临时取出过滤
@@ -92,52 +188,126 @@ class Director:
         if removed:
             logging.info(f"[Director] 已将 {character_name} 从演出队列移除")
 
-    async def dispatch_intent(self, user_input: str, character_names: List[str]) -> List[Dict]:
+    @property
+    def intent_llm(self):
+        """意图识别用的 LLM：配置了专用小模型时用它，否则用对话 LLM（每次读取以跟随热重载）"""
+        return self.components.router_llm or self.components.llm
+
+    def record_user_input(self, user_input: str):
+        """把用户输入记入公共历史"""
+        self.script.add_message("user", user_input)
+
+    async def commit(self, user_input: str, targets: List[str], characters: Dict = None) -> List[Dict]:
         """
-        根据用户输入，让 AI 选择需要回复的角色列表，生成分发指令。
-        返回格式: [{"character": "name1", "text": "user_input"}, ...]
+        按路由结果生成分发指令并注册到台词队列，注册后角色的输出才会演出。
+        传入 characters 时记下各角色当前的代次（应在角色开始这轮生成之后调用），被打断的台词不会再演出。
         """
-        self.script.add_message("user", user_input)
-        
+        instructions = [{"character": name, "text": user_input} for name in targets]
+        for cmd in instructions:
+            character = (characters or {}).get(cmd["character"])
+            await self.script.register_line(cmd["character"], character.generation if character else None)
+        return instructions
+
+    def next_rank(self) -> int:
+        """按预期的演出顺序发号，角色开始生成时领取，TTS 调度据此决定合成的先后"""
+        self._rank += 1
+        return self._rank
+
+    def predict_speaker(self, character_names: List[str]) -> Optional[str]:
+        """猜测下一位回复的角色：上一位说话的角色，没有则取第一位"""
+        if not character_names:
+            return None
+        if self.last_speaker in character_names:
+            return self.last_speaker
+        return character_names[0]
+
+    def quick_route(self, user_input: str, character_names: List[str]) -> Optional[List[str]]:
+        """
+        决定需要回复的角色（按回复顺序），按代价从低到高分层：只有一个角色 / 用户点名 -> 最近的相同决策。
+        不需要询问 LLM 就能决定时返回角色列表，否则返回 None，由调用方再调用 slow_route()。
+        """
+        stats = self.components.route_stats
+
+        # 1. 只有一个角色，无需决策
+        if len(character_names) == 1:
+            stats["single"] += 1
+            return list(character_names)
+
+        # 2. 用户点名（角色名或别名），按出现顺序回复
+        mentioned = self._find_mentions(user_input, character_names)
+        if mentioned:
+            stats["mention"] += 1
+            return mentioned
+
+        # 3. 最近做过相同的决策
+        cached = self.components.route_cache.get(self._route_key(user_input, character_names))
+        if cached and cached[0] > time.monotonic():
+            stats["cache"] += 1
+            return list(cached[1])
+        return None
+
+    @staticmethod
+    def _route_key(user_input: str, character_names: List[str]):
+        return " ".join(unicodedata.normalize("NFKC", user_input).split()), tuple(character_names)
+
+    async def slow_route(self, user_input: str, character_names: List[str]) -> List[str]:
+        """quick_route() 无法决定时询问 LLM，并缓存决策；LLM 也给不出结果时保底选第一个角色"""
         if not character_names:
             return []
-        
-        # 构建提示词，让 AI 返回 JSON 数组格式
+        stats = self.components.route_stats
+
+        # 4. 询问 LLM
+        targets = await self._route_by_llm(user_input, character_names)
+        if targets:
+            stats["llm"] += 1
+            self.components.route_cache.put(
+                self._route_key(user_input, character_names),
+                (time.monotonic() + self.route_cache_ttl, tuple(targets)))
+            return targets
+
+        # 保底选一个
+        stats["fallback"] += 1
+        return [character_names[0]]
+
+    def _find_mentions(self, user_input: str, character_names: List[str]) -> List[str]:
+        text = user_input.lower()
+        positions = {}
+        for name in character_names:
+            matches = [_mention_pattern(alias).search(text) for alias in self.aliases.get(name, [name]) if alias]
+            found = [match.start() for match in matches if match]
+            if found:
+                positions[name] = min(found)
+        return sorted(positions, key=positions.get)
+
+    async def _route_by_llm(self, user_input: str, character_names: List[str]) -> List[str]:
+        """让 LLM 以 JSON 对象返回要回复的角色，只需几个 token"""
         char_list_str = ", ".join(character_names)
         prompt = (
             f"你是导演，分析用户输入，从备选角色中选择需要回复的角色。\n"
             f"备选角色: [{char_list_str}]\n"
             f"用户输入: \"{user_input}\"\n\n"
-            f"以 JSON 数组格式返回角色名列表，如 ['maho'] 或 ['maho', 'mayuri']。"
+            f"只输出 JSON 对象，如 {{\"characters\": [\"{character_names[0]}\"]}}。"
         )
-        
-        # 调用 LLM 获取角色列表
+
         response = ""
-        async for chunk in self.intent_llm.generate(prompt):
-            response += chunk
-        
-        # 解析返回的角色列表
-        targets = []
-        if response:
-            try:
-                import json
-                parsed = json.loads(response.strip())
-                if isinstance(parsed, list):
-                    targets = [name for name in parsed if name in character_names]
-            except:
-                # 解析失败，尝试简单匹配
-                targets = [name for name in character_names if name in response]
-        
-        # 保底选一个
-        if not targets:
-            targets = [character_names[0]]
-        
-        # 生成分发指令并注册到台词队列
-        instructions = [{"character": name, "text": user_input} for name in targets]
-        for cmd in instructions:
-            await self.script.register_line(cmd["character"])
-        
-        return instructions
+        try:
+            async for chunk in self.intent_llm.generate(
+                    prompt, max_tokens=self.router_max_tokens, temperature=0, json_mode=True):
+                response += chunk
+        except Exception as e:
+            logging.warning(f"[Director] 意图识别调用失败: {e}")
+            return []
+
+        try:
+            parsed = json.loads(response.strip())
+            if isinstance(parsed, dict):
+                parsed = parsed.get("characters", [])
+            if isinstance(parsed, list):
+                return [name for name in parsed if name in character_names]
+        except ValueError:
+            pass
+        # 解析失败，尝试简单匹配
+        return [name for name in character_names if name in response]
 
     def get_situation_context(self) -> str:
         """
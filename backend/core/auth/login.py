@@ -1,6 +1,10 @@
+import asyncio
 import hashlib
+import hmac
+import os
 import secrets
 import json
+import time
 import base64
 import logging
 from pathlib import Path
@@ -9,17 +13,58 @@ import sys
 # 添加项目根路径
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from core.util.storage import get_database_connection
+from core.util.lru_cache import LRUCache
 
 
 class AuthManager:
     """
     用户认证管理器，负责用户注册、登录、token生成和验证
+    token 为 HMAC-SHA256 签名的无状态令牌（载荷.签名），带过期时间，验证只在内存中完成。
+    签名密钥依次取：参数 secret、环境变量 MAHO_AUTH_SECRET、data/auth_secret（不存在时自动生成）。
+    user_check_ttl > 0 时，验证通过后还会确认用户仍然存在，结果缓存 user_check_ttl 秒，
+    删除的用户最迟在这段时间后失效；为 0 时不查数据库。
+    在事件循环上请使用 averify_token()：缓存未命中时的数据库查询放到线程中执行，不阻塞其他连接。
     """
+
+    # 配置文件 auth 段可用的键，与 __init__ 的参数一致
+    CONFIG_KEYS = ("db_name", "secret", "token_ttl", "user_check_ttl", "secret_file")
     
-    def __init__(self, db_name: str = "data/db/users.db"):
+    def __init__(self, db_name: str = "data/db/users.db", secret: str = "", token_ttl: int = 7 * 24 * 3600,
+                 user_check_ttl: int = 60, secret_file: str = "data/auth_secret"):
         self.db_name = db_name
+        self.token_ttl = token_ttl
+        self.user_check_ttl = user_check_ttl
+        self._secret = self._load_secret(secret or os.environ.get("MAHO_AUTH_SECRET", ""), secret_file)
+        self._user_cache = LRUCache(max_entries=1024)  # username -> (过期时间, 是否存在)
         self._init_database()
-    
+
+    @classmethod
+    def from_config(cls, config: dict = None) -> "AuthManager":
+        """按配置文件的 auth 段创建，忽略（并提示）不认识的键，避免拼写错误导致启动失败"""
+        config = dict(config or {})
+        unknown = [key for key in config if key not in cls.CONFIG_KEYS]
+        if unknown:
+            logging.warning(f"auth 配置中存在未知的键，已忽略: {unknown}")
+        return cls(**{key: config[key] for key in cls.CONFIG_KEYS if key in config})
+
+    @staticmethod
+    def _load_secret(secret: str, secret_file: str) -> bytes:
+        """取签名密钥，未配置时读取（或生成并保存）密钥文件，重启后已签发的 token 依然有效"""
+        if secret:
+            return secret.encode()
+        path = Path(secret_file)
+        if path.exists():
+            return path.read_text(encoding="utf-8").strip().encode()
+        secret = secrets.token_hex(32)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(secret, encoding="utf-8")
+        try:
+            path.chmod(0o600)
+        except OSError:
+            pass
+        logging.info(f"已生成 token 签名密钥: {path}")
+        return secret.encode()
+
     def _init_database(self):
         """初始化用户数据库表"""
         conn = get_database_connection(self.db_name)
@@ -98,46 +143,97 @@ class AuthManager:
     
     def pack_token(self, username: str) -> str:
         """
-        将用户信息打包成token
+        将用户信息打包成签名 token
         
         参数:
             username: 用户名
         
         返回:
-            str: Base64编码的token字符串
+            str: "Base64载荷.Base64签名" 形式的 token 字符串
         """
-        # 生成随机salt增强安全性
-        salt = secrets.token_hex(16)
         user_info = {
             "username": username,
-            "salt": salt
+            "exp": int(time.time()) + self.token_ttl
         }
-        json_str = json.dumps(user_info)
-        token = base64.urlsafe_b64encode(json_str.encode()).decode()
-        return token
+        payload = self._b64encode(json.dumps(user_info, separators=(",", ":")).encode())
+        return f"{payload}.{self._sign(payload)}"
     
     def verify_token(self, token: str) -> dict:
         """
-        验证token并返回用户信息
+        验证 token 的签名和有效期并返回用户信息（同步版本，供命令行工具使用）。
+        用户存在性检查缓存未命中时会同步查询数据库，事件循环上请使用 averify_token()。
         
         参数:
-            token: Base64编码的token字符串
+            token: pack_token 生成的 token 字符串
         
         返回:
             dict: 验证成功返回用户信息字典，失败返回None
         """
-        try:
-            json_str = base64.urlsafe_b64decode(token.encode()).decode()
-            user_info = json.loads(json_str)
-            
-            # 验证用户是否存在
-            username = user_info.get("username")
-            if username and self._user_exists(username):
-                return user_info
+        user_info = self._decode_token(token)
+        if user_info and self._user_still_exists(user_info["username"]):
+            return user_info
+        return None # pyright: ignore[reportReturnType]
+
+    async def averify_token(self, token: str) -> dict:
+        """
+        verify_token 的异步版本：签名和有效期只在内存中验证，
+        用户存在性检查缓存未命中时把数据库查询放到线程中执行，不阻塞事件循环。
+        """
+        user_info = self._decode_token(token)
+        if not user_info:
             return None # pyright: ignore[reportReturnType]
+        username = user_info["username"]
+        exists = self._cached_user_exists(username)
+        if exists is None:
+            exists = await asyncio.to_thread(self._check_user, username)
+        return user_info if exists else None # pyright: ignore[reportReturnType]
+
+    def _decode_token(self, token: str) -> dict:
+        """校验签名与有效期，返回载荷中的用户信息，失败返回 None"""
+        try:
+            payload, _, signature = token.partition(".")
+            if not signature or not hmac.compare_digest(signature, self._sign(payload)):
+                return None # pyright: ignore[reportReturnType]
+            user_info = json.loads(self._b64decode(payload))
+            if user_info.get("exp", 0) < time.time() or not user_info.get("username"):
+                return None # pyright: ignore[reportReturnType]
+            return user_info
         except Exception as e:
             logging.error(f"验证token失败: {e}")
             return None # pyright: ignore[reportReturnType]
+
+    def _sign(self, payload: str) -> str:
+        return self._b64encode(hmac.new(self._secret, payload.encode(), hashlib.sha256).digest())
+
+    @staticmethod
+    def _b64encode(data: bytes) -> str:
+        return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+    @staticmethod
+    def _b64decode(data: str) -> bytes:
+        return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+    def _user_still_exists(self, username: str) -> bool:
+        """带短期缓存的用户存在性检查，user_check_ttl 为 0 时直接信任签名"""
+        exists = self._cached_user_exists(username)
+        if exists is None:
+            exists = self._check_user(username)
+        return exists
+
+    def _cached_user_exists(self, username: str) -> bool | None:
+        """只查缓存：不需要检查时返回 True，缓存未命中或已过期返回 None"""
+        if self.user_check_ttl <= 0:
+            return True
+        cached = self._user_cache.get(username)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        return None
+
+    def _check_user(self, username: str) -> bool:
+        """查询数据库并缓存结果（会阻塞，异步调用方需放到线程中执行）"""
+        exists = self._user_exists(username)
+        self._user_cache.put(username, (time.monotonic() + self.user_check_ttl, exists))
+        return exists
     
     def _user_exists(self, username: str) -> bool:
         """检查用户是否存在"""
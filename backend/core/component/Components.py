@@ -1,32 +1,281 @@
 from pathlib import Path
 import asyncio
-from core.util.config import load_yaml
+import inspect
+import logging
+import time
+import uuid
+from core.util.config import ConfigService
 from core.component.llm.LLMService import LLM
 from core.component.tts.TTSService import TTS
 from core.component.translator.TranslatorService import Translator
 from core.component.asr.ASRService import ASR
+from core.util.audio import AudioEncoder
+from core.util.lru_cache import LRUCache
 from core.util.resource_lock import ResourceLock, DummyLock
 
 
 class Components:
     """
-        Components核心类，负责初始化和管理核心功能
+        Components核心类，负责初始化和管理核心功能。
+        这里只放进程级共享的重量级组件（LLM 客户端、翻译、TTS 模型），应用启动时创建一次，
+        所有连接共用；每个连接通过 create_session() 拿到自己的 SessionComponents。
     """
 
-    def __init__(self):
-        config_path = Path("config.yaml")
-        self.config = load_yaml(config_path)
-        
+    # 可热重载的组件: 配置段名 -> 服务类
+    # router_llm 是可选的意图识别专用小模型，未配置时为 None，导演改用 llm
+    RELOADABLE = {
+        "llm": LLM,
+        "tts": TTS,
+        "translator": Translator,
+        "router_llm": lambda config: LLM(config) if config else None,
+    }
+
+    def __init__(self, config_service: ConfigService = None):
+        # 配置只在这里解析一次，之后所有会话都读内存快照
+        self.config_service = config_service or ConfigService(Path("config.yaml"))
+
         # 读取 components 下的组件配置
         components_config = self.config.get("components", {})
-        
+
         self.llm = LLM(components_config.get("llm", {}))
         self.tts = TTS(components_config.get("tts", {}))
         self.translator = Translator(components_config.get("translator", {}))
+        self.router_llm = self.RELOADABLE["router_llm"](components_config.get("router_llm"))
+
+        # 意图路由：最近的决策缓存（跨会话共享，值为 (过期时间, 角色列表)）与各层命中统计，
+        # speculation_hit/miss 是询问 LLM 期间投机启动的角色猜中/猜错的次数
+        self.route_cache = LRUCache(max_entries=256)
+        self.route_stats = {"single": 0, "mention": 0, "cache": 0, "llm": 0, "fallback": 0,
+                            "speculation_hit": 0, "speculation_miss": 0}
+
+        # 所有角色的 TTS 模型在这里统一加载一次，连接建立时不再重复加载
+        self._register_tts_characters()
+
+        # 当前引用这份共享组件的会话数
+        self.session_count = 0
+        self.sessions = set()  # 当前连接的会话视图，用于汇总各会话的指标
+
+        # 预热状态，供 /api/ready 查询
+        self.readiness = {"ready": False, "components": {}}
+
+        # 热重载回调运行在线程里，需要异步释放的旧组件（如 HTTP 连接池）交回主事件循环关闭
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+
+        self.config_service.subscribe(self._on_config_change)
+
+    @property
+    def config(self):
+        """当前配置快照（只读）"""
+        return self.config_service.get()
+
+    def _on_config_change(self, old_config, new_config):
+        """
+        配置热重载：只重建配置段发生变化的组件。
+        新实例完全构建好之后才替换属性，进行中的调用继续使用旧实例，
+        旧实例等这些调用全部结束（最多 reload.drain_timeout 秒）后再关闭。
+        """
+        old_components = old_config.get("components", {})
+        new_components = new_config.get("components", {})
+
+        for section, service_class in self.RELOADABLE.items():
+            if old_components.get(section) == new_components.get(section):
+                continue
+            try:
+                old_component = getattr(self, section)
+                setattr(self, section, service_class(new_components.get(section, {})))
+                logging.info(f"配置段 {section} 已变化，组件已重建")
+            except Exception as e:
+                logging.error(f"重建组件 {section} 失败，继续使用旧实例: {e}")
+                continue
+            # 旧实例上正在进行的调用（如流式回复）还要用它的连接和线程池，结束后再释放
+            if self._loop:
+                drain_timeout = new_config.get("reload", {}).get("drain_timeout", 300)
+                asyncio.run_coroutine_threadsafe(self._retire(section, old_component, drain_timeout), self._loop)
+            else:
+                self._close_component(old_component)
+
+        if (old_components.get("tts") != new_components.get("tts")
+                or old_config.get("characters") != new_config.get("characters")):
+            self._register_tts_characters()
+
+    def _register_tts_characters(self):
+        """为配置中的每个角色注册 TTS 模型"""
+        if not hasattr(self.tts, 'register_character'):
+            return
+
+        for conf in self.config.get("characters", []) or []:
+            tts_config = conf.get("tts_config", {}) or {}
+            char_name = tts_config.get("character_name", conf.get("name"))
+            model_dir = tts_config.get("onnx_model_dir")
+            if char_name and model_dir:
+                try:
+                    self.tts.register_character(char_name, model_dir)
+                    logging.info(f"TTS 角色 '{char_name}' 已注册")
+                except Exception as e:
+                    logging.error(f"注册 TTS 角色 '{char_name}' 失败: {e}")
+
+    async def warmup(self):
+        """
+        启动预热：对 LLM、翻译以及每个角色的 TTS 各跑一次极小的请求，
+        让模型加载、ONNX 会话构建、翻译模型下载等冷启动开销在接入用户之前完成。
+        """
+        warmup_config = self.config.get("warmup", {})
+        steps = {}
+        if warmup_config.get("enabled", True):
+            steps["llm"] = lambda: self._warmup_llm(self.llm)
+            if self.router_llm:
+                steps["router_llm"] = lambda: self._warmup_llm(self.router_llm)
+            steps["translator"] = lambda: self._warmup_translator(
+                self.translator, warmup_config.get("translator_text", "你好"))
+            for conf in self.config.get("characters", []) or []:
+                tts_config = dict(conf.get("tts_config", {}) or {})
+                if tts_config:
+                    steps[f"tts:{conf.get('name')}"] = (
+                        lambda cfg=tts_config: self._warmup_tts(
+                            self.tts, warmup_config.get("tts_text", "こんにちは。"), cfg))
+
+        status = {name: {"status": "pending"} for name in steps}
+        self.readiness = {"ready": False, "components": status}
+
+        for name, step in steps.items():
+            start = time.perf_counter()
+            try:
+                await step()
+                status[name] = {"status": "ok"}
+            except Exception as e:
+                status[name] = {"status": "error", "error": str(e)}
+                logging.error(f"预热 {name} 失败: {e}")
+            status[name]["seconds"] = round(time.perf_counter() - start, 3)
+            logging.info(f"预热 {name}: {status[name]}")
+
+        self.readiness["ready"] = all(item["status"] == "ok" for item in status.values())
+        logging.info(f"预热完成，就绪: {self.readiness['ready']}")
+
+    @staticmethod
+    async def _warmup_llm(llm):
+        """只生成一个 token，触发模型加载；openai_api 出错时不抛异常而是输出 "错误: ..."，同样视为失败"""
+        async for text in llm.generate("你好", max_tokens=1):
+            if text.startswith("错误: "):
+                raise RuntimeError(text[len("错误: "):])
+
+    @staticmethod
+    async def _warmup_translator(translator, text: str):
+        """翻译一句短文本；各 provider 失败时普遍返回原文而不抛异常，原样返回视为失败"""
+        bypassed = translator.bypassed
+        result = await translator.atranslate(text)
+        # 预热文本本身就是目标语言时不会请求 provider，无从判断，按成功处理
+        if translator.bypassed == bypassed and (not result or result == text):
+            raise RuntimeError("翻译服务返回了原文，请检查 provider 配置（如 appid/密钥）")
+
+    @staticmethod
+    async def _warmup_tts(tts, text: str, tts_config: dict):
+        """合成一句短文本；provider 吞掉异常时 synthesize() 返回空，同样视为失败"""
+        if not await tts.synthesize(text, "warmup", **tts_config):
+            raise RuntimeError("TTS 没有合成出音频")
+
+    async def _retire(self, section: str, component, drain_timeout: float):
+        """等被替换的旧组件上的调用全部结束后关闭它，超时则强制关闭"""
+        inflight = getattr(component, "inflight", None)
+        if inflight and not await inflight.wait_idle(drain_timeout):
+            logging.warning(f"旧组件 {section} 仍有 {inflight.active} 个调用未结束，超过 {drain_timeout} 秒，强制关闭")
+        result = self._close_component(component)
+        if result is not None:
+            await result
+        logging.info(f"旧组件 {section} 已关闭")
+
+    @staticmethod
+    def _close_component(component):
+        """调用组件的 close()；close 是异步的则返回待执行的协程"""
+        close = getattr(component, "close", None)
+        if close:
+            result = close()
+            if inspect.isawaitable(result):
+                return result
+        return None
+
+    async def close(self):
+        """应用关闭时释放共享组件持有的资源（如 TTS worker 进程、HTTP 连接池）"""
+        for component in (self.llm, self.tts, self.translator, self.router_llm):
+            result = self._close_component(component)
+            if result is not None:
+                await result
+
+    def metrics(self) -> dict:
+        """汇总各共享组件的运行指标"""
+        return {
+            "sessions": self.session_count,
+            "session_queues": {session.session_id: session.queue_stats() for session in list(self.sessions)},
+            "tts_locks": {session.session_id: session.tts_lock.stats()
+                          for session in list(self.sessions) if session.tts_lock.stats()},
+            "tts_scheduler": self.tts.scheduler.stats(),
+            "tts_cache": self.tts.cache.stats() if self.tts.cache else None,
+            "translator": self.translator.stats(),
+            "router": dict(self.route_stats),
+        }
+
+    def create_session(self) -> "SessionComponents":
+        """为一个新连接创建会话视图，并增加引用计数"""
+        self.session_count += 1
+        session = SessionComponents(self)
+        self.sessions.add(session)
+        return session
+
+    def release_session(self, session: "SessionComponents"):
+        """连接断开时释放会话视图"""
+        self.session_count = max(0, self.session_count - 1)
+        self.sessions.discard(session)
+        logging.info(f"会话 {session.session_id} 已释放，当前会话数: {self.session_count}")
+
+
+class SessionComponents:
+    """
+        单个连接的组件视图。
+        ASR 流、TTS 资源锁、音频输出编码这类按用户隔离的状态放在这里，
+        其余属性（config、llm、tts、translator）都转发给共享的 Components。
+    """
+
+    def __init__(self, shared: Components):
+        self.shared = shared
+        self.session_id = uuid.uuid4().hex
+
+        components_config = shared.config.get("components", {})
         self.asr = ASR(components_config.get("asr", {}))
 
-        # 根据配置决定是否启用 TTS 资源锁
-        if components_config.get("tts", {}).get("use_resource_lock", True):
-            self.tts_lock = ResourceLock()
+        # 根据配置决定是否启用整段回复粒度的 TTS 资源锁（默认关闭，由调度器按句排序）
+        tts_config = components_config.get("tts", {})
+        if tts_config.get("use_resource_lock", False):
+            self.tts_lock = ResourceLock(timeout=tts_config.get("lock_timeout", 30))
         else:
-            self.tts_lock = DummyLock()
\ No newline at end of file
+            self.tts_lock = DummyLock()
+
+        # 音频输出编码，客户端可在 hello 握手时声明自己偏好的格式覆盖默认值
+        self.audio_encoder = AudioEncoder(**shared.config.get("audio_output", {}))
+
+        self.characters = {}  # 本会话的角色实例，由 WSHandler 创建后填入
+
+    def set_audio_format(self, preference: dict):
+        """按客户端声明的格式重建编码器，格式非法时保留原设置"""
+        try:
+            self.audio_encoder = AudioEncoder(
+                format=preference.get("format", self.audio_encoder.format),
+                sample_rate=preference.get("sample_rate", self.audio_encoder.sample_rate))
+        except (TypeError, ValueError) as e:
+            logging.warning(f"客户端音频格式无效，沿用默认设置: {e}")
+
+    def queue_stats(self) -> dict:
+        """本会话各角色处理队列的当前排队量与峰值（条数、字节数）"""
+        return {name: character.queue_stats() for name, character in self.characters.items()}
+
+    def __getattr__(self, name):
+        """未在会话内定义的属性一律转发给共享的 Components"""
+        if name == "shared":
+            raise AttributeError(name)
+        return getattr(self.shared, name)
+
+    def close(self):
+        """释放会话，归还共享组件的引用"""
+        self.tts_lock.close()
+        self.shared.release_session(self)
@@ -1,4 +1,5 @@
 import importlib
+from core.util.inflight import Inflight
 
 
 class LLM:
@@ -9,6 +10,7 @@ class LLM:
             def generate(self, prompt: str) -> str:
                 ...
         generate方法用于生成文本响应。
+        generate 经服务层转发并计入进行中的调用，热重载时旧实例等回复全部结束后再关闭。
     """
     def __init__(self, config: dict) -> None:
         # 1. 获取配置中的模块名
@@ -31,6 +33,13 @@ class LLM:
         llm_config = config.get(select, {})
 
         self.provider = client_class(**llm_config)
+        self.inflight = Inflight()
+
+    async def generate(self, *args, **kwargs):
+        """转发给 provider.generate()，流式输出期间计入进行中的调用"""
+        with self.inflight:
+            async for chunk in self.provider.generate(*args, **kwargs):
+                yield chunk
 
     def __getattr__(self, name):
         """
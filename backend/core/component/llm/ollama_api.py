@@ -1,13 +1,48 @@
 import aiohttp
 import json
 
+# 进程内共享的 HTTP 会话：(base_url, 连接数上限, keep-alive 时长) -> [ClientSession, 引用数]
+# LLM、意图识别、Ollama 翻译指向同一服务时共用一个连接池，热重载时新旧 Client 交替也不会断开长连接
+# 超时不属于会话：各 Client 的超时设置不同，每次请求单独传入
+_sessions = {}
+
 
 class Client:
-    def __init__(self, model: str, base_url: str = "http://localhost:11434"):
+    def __init__(self, model: str, base_url: str = "http://localhost:11434", max_connections: int = 16,
+                 timeout: float = 120, connect_timeout: float = 5, keepalive_timeout: float = 60):
         self.model = model
         self.base_url = base_url
+        # timeout 是两次读到数据之间的最长间隔，流式生成的总时长不受限制
+        self.timeout = aiohttp.ClientTimeout(total=None, connect=connect_timeout, sock_read=timeout)
+        self._key = (base_url, max_connections, keepalive_timeout)
+        self._closed = False
+        _sessions.setdefault(self._key, [None, 0])[1] += 1
+
+    def _session(self) -> aiohttp.ClientSession:
+        """取得共享会话，首次使用（或已被关闭）时在当前事件循环上创建"""
+        entry = _sessions.setdefault(self._key, [None, 1])
+        if entry[0] is None or entry[0].closed:
+            _, max_connections, keepalive_timeout = self._key
+            connector = aiohttp.TCPConnector(limit=max_connections, keepalive_timeout=keepalive_timeout)
+            entry[0] = aiohttp.ClientSession(connector=connector)
+        return entry[0]
 
-    async def generate(self, prompt: str | list, max_tokens: int = 512, temperature: float = 0.7):
+    async def close(self):
+        """释放对共享会话的引用，最后一个引用方负责关闭连接池"""
+        if self._closed:
+            return
+        self._closed = True
+        entry = _sessions.get(self._key)
+        if not entry:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del _sessions[self._key]
+            if entry[0] and not entry[0].closed:
+                await entry[0].close()
+
+    async def generate(self, prompt: str | list, max_tokens: int = 512, temperature: float = 0.7,
+                       json_mode: bool = False):
         if isinstance(prompt, list):
             url = f"{self.base_url}/api/chat"
             payload = {
@@ -31,19 +66,22 @@ class Client:
                 }
             }
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload) as response:
-                response.raise_for_status()
-                while True:
-                    line = await response.content.readline()
-                    if not line:
+        if json_mode:
+            # 约束模型只输出合法 JSON
+            payload["format"] = "json"
+
+        async with self._session().post(url, json=payload, timeout=self.timeout) as response:
+            response.raise_for_status()
+            while True:
+                line = await response.content.readline()
+                if not line:
+                    break
+                if line:
+                    body = json.loads(line)
+                    if isinstance(prompt, list):
+                        token = body.get("message", {}).get("content", "")
+                    else:
+                        token = body.get("response", "")
+                    yield token
+                    if body.get("done", False):
                         break
-                    if line:
-                        body = json.loads(line)
-                        if isinstance(prompt, list):
-                            token = body.get("message", {}).get("content", "")
-                        else:
-                            token = body.get("response", "")
-                        yield token
-                        if body.get("done", False):
-                            break
@@ -15,7 +15,12 @@ class Client:
         )
         self.model = model
 
-    async def generate(self, prompt: str | list, max_tokens: int = 512, temperature: float = 0.7):
+    async def close(self):
+        """关闭底层 HTTP 连接池"""
+        await self.client.close()
+
+    async def generate(self, prompt: str | list, max_tokens: int = 512, temperature: float = 0.7,
+                       json_mode: bool = False):
         messages = []
         if isinstance(prompt, str):
             messages = [{"role": "user", "content": prompt}]
@@ -28,7 +33,9 @@ class Client:
                 messages=messages,
                 max_tokens=max_tokens,
                 temperature=temperature,
-                stream=True
+                stream=True,
+                # 约束模型只输出 JSON 对象
+                **({"response_format": {"type": "json_object"}} if json_mode else {})
             )
 
             async for chunk in stream:
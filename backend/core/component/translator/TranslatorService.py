@@ -1,4 +1,10 @@
+import asyncio
+import functools
 import importlib
+from concurrent.futures import ThreadPoolExecutor
+from core.util.translation_cache import TranslationCache
+from core.util.lang_detect import detect_language, normalize_lang
+from core.util.inflight import Inflight
 
 
 class Translator:
@@ -9,6 +15,10 @@ class Translator:
             def translate(self, text: str, from_lang: str, to_lang: str) -> str:
                 ...
         translate方法用于生成翻译响应。
+        基于 HTTP 异步客户端的组件可改为实现 async def atranslate(...)，直接在主事件循环上运行并复用长连接；
+        只实现同步 translate 的组件在有界线程池中执行。
+        外部统一调用 atranslate：已是目标语言或没有文字（纯标点、emoji）的句子直接返回原文，
+        其余先查翻译缓存，缓存对所有 provider 生效，provider 本身无需关心。
     """
     def __init__(self, config: dict) -> None:
         # 1. 获取配置中的模块名
@@ -31,6 +41,71 @@ class Translator:
         trans_config = config.get(select, {})
 
         self.provider = client_class(**trans_config)
+        self.select = select
+        # 目标语言，用于判断句子是否已经不需要翻译（各 provider 的默认目标语言均为日语）
+        self.target_lang = normalize_lang(config.get("target_lang", "ja"))
+        self.bypassed = 0
+        self.inflight = Inflight()  # 进行中的翻译数，热重载时旧实例等它们结束再关闭
+
+        # 翻译缓存：相同的句子不再重复请求翻译服务
+        cache_config = dict(config.get("cache", {}))
+        self.cache = TranslationCache(**cache_config) if cache_config.pop("enabled", True) else None
+
+        # 同步 provider 的专用线程池，限制同时进行的翻译数，也不占用默认线程池
+        self.executor = None
+        if not hasattr(self.provider, "atranslate"):
+            self.executor = ThreadPoolExecutor(
+                max_workers=config.get("max_workers", 8), thread_name_prefix="translator")
+
+    async def atranslate(self, text: str, from_lang: str = None, to_lang: str = None) -> str:
+        """翻译文本，未指定的语言参数沿用 provider 的默认值"""
+        with self.inflight:
+            return await self._atranslate(text, from_lang, to_lang)
+
+    async def _atranslate(self, text: str, from_lang: str = None, to_lang: str = None) -> str:
+        if not text or not text.strip():
+            return text
+
+        # LLM 已经直接用目标语言回答，或句子里没有可翻译的文字，省掉一次翻译请求
+        source_lang = detect_language(text)
+        if source_lang is None or source_lang == normalize_lang(to_lang or self.target_lang):
+            self.bypassed += 1
+            return text
+
+        key = TranslationCache.make_key(self.select, from_lang, to_lang, text)
+        if self.cache:
+            result = await self.cache.get(key)
+            if result is not None:
+                return result
+
+        kwargs = {k: v for k, v in (("from_lang", from_lang), ("to_lang", to_lang)) if v}
+        if self.executor is None:
+            result = await self.provider.atranslate(text, **kwargs)
+        else:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self.executor, functools.partial(self.provider.translate, text, **kwargs))
+
+        # provider 失败时普遍返回原文，这种结果不缓存，下次再试
+        if self.cache and result and result != text:
+            await self.cache.put(key, result)
+        return result
+
+    def stats(self) -> dict:
+        provider_stats = getattr(self.provider, "stats", None)
+        return {
+            "bypassed": self.bypassed,
+            "cache": self.cache.stats() if self.cache else None,
+            "provider": provider_stats() if provider_stats else None,
+        }
+
+    def close(self):
+        if self.executor:
+            # 热重载时 Components 等旧实例上的翻译全部结束才调用 close()，这里不取消也不等待
+            self.executor.shutdown(wait=False)
+        close = getattr(self.provider, "close", None)
+        if close:
+            return close()
 
     def __getattr__(self, name):
         """
@@ -1,62 +1,105 @@
+import sys
+import threading
 import argostranslate.package
 import argostranslate.translate
-from langdetect import detect
+from core.util.lang_detect import detect_language
 import logging
 
 
+def install_package(from_lang: str, to_lang: str) -> bool:
+    """联网下载并安装指定语言对的模型包（管理操作，不在翻译热路径上执行）"""
+    argostranslate.package.update_package_index()
+    available_packages = argostranslate.package.get_available_packages()
+    try:
+        package_to_install = next(
+            filter(
+                lambda x: x.from_code == from_lang and x.to_code == to_lang, available_packages
+            )
+        )
+    except StopIteration:
+        logging.warning(f"Argos Translate: 未找到 {from_lang} 到 {to_lang} 的模型包。")
+        return False
+    argostranslate.package.install_from_path(package_to_install.download())
+    logging.info(f"Argos Translate: 已安装 {from_lang} 到 {to_lang} 的模型包。")
+    return True
+
+
 class Client:
     """
     Argos Translate 离线翻译客户端，自动识别源语言并翻译。
+    启动时扫描一次本地已安装的模型包，翻译对象按语言对常驻内存，翻译时不会联网或重复安装。
+    缺少的语言对需要用本模块的命令行提前安装:
+        python -m core.component.translator.argos_api install zh en
     """
 
     def __init__(self, **kwargs):
         # 支持配置目标语言，默认日语
         self.to_lang = kwargs.get("to_lang", "ja")
-        self.model_installed = False
-        self.translate("你好")  # 预加载模型
+        # 本地已安装的语言索引（只读本地目录，不联网）
+        self.languages = {lang.code: lang for lang in argostranslate.translate.get_installed_languages()}
+        self._translations = {}  # (from_lang, to_lang) -> 翻译对象，未安装的语言对记为 None
+        self._lock = threading.Lock()
+        logging.info(f"Argos Translate: 已安装的语言对 {self.installed_pairs()}")
 
-    def _ensure_model(self, from_lang, to_lang):
-        """尝试加载或下载模型，支持动态语言对"""
-        argostranslate.package.update_package_index()
-        available_packages = argostranslate.package.get_available_packages()
-        try:
-            package_to_install = next(
-                filter(
-                    lambda x: x.from_code == from_lang and x.to_code == to_lang, available_packages
-                )
-            )
-            argostranslate.package.install_from_path(
-                package_to_install.download())
-            logging.info(f"Argos Translate: 已加载 {from_lang} 到 {to_lang} 的模型包。")
-            return True
-        except StopIteration:
-            logging.warning(f"Argos Translate: 未找到 {from_lang} 到 {to_lang} 的模型包。")
-            return False
+    def installed_pairs(self) -> list:
+        return sorted((t.from_lang.code, t.to_lang.code)
+                      for lang in self.languages.values() for t in lang.translations_from)
+
+    def _get_translation(self, from_lang: str, to_lang: str):
+        """按语言对取翻译对象，首次使用时从索引中构建（可经由中间语言转译），之后直接命中内存"""
+        key = (from_lang, to_lang)
+        if key not in self._translations:
+            with self._lock:
+                if key not in self._translations:
+                    source = self.languages.get(from_lang)
+                    target = self.languages.get(to_lang)
+                    translation = source.get_translation(target) if source and target else None
+                    if translation is None:
+                        logging.warning(
+                            f"Argos Translate: 未安装 {from_lang} 到 {to_lang} 的模型包，"
+                            f"请运行 python -m core.component.translator.argos_api install {from_lang} {to_lang}")
+                    self._translations[key] = translation
+        return self._translations[key]
 
     def translate(self, text: str, from_lang: str = '', to_lang: str = 'ja') -> str:
         # 处理空文本
         if not text or not text.strip():
             logging.warning("翻译文本为空，返回原文")
             return text
-        
-        # 自动检测源语言
+
+        # 自动检测源语言（按文字比例判断，带缓存）
         if not from_lang:
-            try:
-                from_lang = detect(text)
-            except Exception as e:
-                logging.warning(f"语言检测失败: {e}，返回原文")
+            from_lang = detect_language(text)
+            if not from_lang:
+                logging.warning("语言检测失败，返回原文")
                 return text
-        
+
         if not to_lang:
             to_lang = self.to_lang
-        
-        # 尝试加载模型，若失败则返回原文
-        if not self._ensure_model(from_lang, to_lang):
-            logging.warning(f"无法加载 {from_lang} 到 {to_lang} 的模型，返回原文")
+
+        # 语言对未安装则返回原文
+        translation = self._get_translation(from_lang, to_lang)
+        if translation is None:
             return text
-        
+
         try:
-            return argostranslate.translate.translate(text, from_lang, to_lang)
+            return translation.translate(text)
         except Exception as e:
             logging.error(f"翻译失败: {e}，返回原文")
             return text
+
+
+# 命令行工具：离线管理模型包，服务运行时不会自动下载
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = sys.argv[1:]
+
+    if args[:1] == ["install"] and len(args) == 3:
+        sys.exit(0 if install_package(args[1], args[2]) else 1)
+    elif args[:1] == ["list"]:
+        for from_code, to_code in Client().installed_pairs():
+            print(f"{from_code} -> {to_code}")
+    else:
+        print("用法:")
+        print("  python -m core.component.translator.argos_api list                 列出已安装的语言对")
+        print("  python -m core.component.translator.argos_api install <源> <目标>  下载并安装语言对，如 install zh en")
@@ -1,34 +1,154 @@
 import requests
 import random
+import threading
+import time
 from hashlib import md5
 import logging
+from requests.adapters import HTTPAdapter
+from core.util.token_bucket import TokenBucket
+
+RATE_LIMITED = "54003"  # 百度翻译：访问频率受限
+
+
+class _Batch:
+    """一批等待合并发送的句子，第一个加入的调用方负责发送，其余调用方等待结果"""
+
+    def __init__(self):
+        self.lines = []
+        self.size = 0  # 已加入文本的 UTF-8 字节数
+        self.full = threading.Event()  # 批次已满，发送方无需等满窗口
+        self.done = threading.Event()
+        self.results = []
+
+    def add(self, line: str) -> int:
+        self.lines.append(line)
+        self.size += len(line.encode("utf-8")) + 1
+        return len(self.lines) - 1
+
 
 class Client:
-    def __init__(self, appid: str, appkey: str, endpoint: str = 'http://api.fanyi.baidu.com'):
+    """
+    百度通用翻译 API。
+    短时间窗口内（可能来自多个会话）的句子会用换行拼成一次请求发送，再按行分发回各调用方；
+    请求经过令牌桶限流以符合账号 QPS 配额，遇到 54003 限频错误时退避重试，HTTP 连接池化复用。
+    """
+
+    def __init__(self, appid: str, appkey: str, endpoint: str = 'http://api.fanyi.baidu.com',
+                 qps: float = 1, batch_window_ms: int = 50, max_batch_bytes: int = 3000, max_retries: int = 2):
         self.appid = appid
         self.appkey = appkey
         self.endpoint = endpoint
         self.path = '/api/trans/vip/translate'
         self.url = self.endpoint + self.path
 
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.limiter = TokenBucket(rate=qps)
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_bytes = max_batch_bytes
+        self.max_retries = max_retries
+
+        self._lock = threading.Lock()
+        self._pending = {}  # (from_lang, to_lang) -> 正在收集句子的 _Batch
+
+        # 统计计数由多个翻译线程更新，都在 _lock 下修改
+        self.requests_sent = 0
+        self.sentences = 0
+        self.rate_limited = 0
+
     def translate(self, text: str, from_lang: str = 'auto', to_lang: str = 'jp') -> str:
-        salt = random.randint(32768, 65536)
-        sign = md5((self.appid + text + str(salt) + self.appkey).encode('utf-8')).hexdigest()
-        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-        payload = {
-            'appid': self.appid,
-            'q': text,
-            'from': from_lang,
-            'to': to_lang,
-            'salt': salt,
-            'sign': sign
-        }
-        try:
-            r = requests.post(self.url, params=payload, headers=headers, timeout=5)
-            result = r.json()
-            if 'trans_result' in result:
-                return '\n'.join([item['dst'] for item in result['trans_result']])
-            else:
-                return text
-        except Exception as e:
+        # 批量请求以换行分隔句子，句子内部的换行先压成空格
+        line = " ".join(text.split())
+        if not line:
             return text
+
+        key = (from_lang, to_lang)
+        with self._lock:
+            batch = self._pending.get(key)
+            is_sender = batch is None
+            if batch and batch.size + len(line.encode("utf-8")) > self.max_batch_bytes:
+                # 当前批次放不下，立即发出，本句开启新批次
+                batch.full.set()
+                is_sender = True
+            if is_sender:
+                batch = _Batch()
+                self._pending[key] = batch
+            index = batch.add(line)
+            self.sentences += 1
+
+        if is_sender:
+            batch.full.wait(self.batch_window)
+            with self._lock:
+                if self._pending.get(key) is batch:
+                    del self._pending[key]
+            try:
+                batch.results = self._send_batch(batch.lines, from_lang, to_lang)
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        result = batch.results[index] if index < len(batch.results) else None
+        return result if result is not None else text
+
+    def _send_batch(self, lines: list, from_lang: str, to_lang: str) -> list:
+        """发送一批句子，返回与 lines 一一对应的译文，失败的位置为 None"""
+        items = self._request("\n".join(lines), from_lang, to_lang)
+        if items is None:
+            return [None] * len(lines)
+        results = [item['dst'] for item in items]
+        if len(results) == len(lines):
+            return results
+        if len(lines) == 1:
+            return ['\n'.join(results)]
+        # 返回行数与请求对不上时无法可靠对应，退回逐句请求
+        logging.warning(f"百度翻译批量结果行数不匹配 ({len(results)}/{len(lines)})，改为逐句请求")
+        return [self._send_batch([line], from_lang, to_lang)[0] for line in lines]
+
+    def _request(self, query: str, from_lang: str, to_lang: str) -> list | None:
+        """调用一次百度翻译接口，返回 trans_result 列表，失败返回 None"""
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            salt = random.randint(32768, 65536)
+            sign = md5((self.appid + query + str(salt) + self.appkey).encode('utf-8')).hexdigest()
+            payload = {
+                'appid': self.appid,
+                'q': query,
+                'from': from_lang,
+                'to': to_lang,
+                'salt': salt,
+                'sign': sign
+            }
+            with self._lock:
+                self.requests_sent += 1
+            try:
+                r = self.session.post(self.url, data=payload, timeout=5)
+                result = r.json()
+            except Exception as e:
+                logging.warning(f"百度翻译请求失败: {e}")
+                return None
+
+            if 'trans_result' in result:
+                return result['trans_result']
+            if str(result.get('error_code')) == RATE_LIMITED:
+                with self._lock:
+                    self.rate_limited += 1
+                time.sleep(0.5 * (attempt + 1))
+                continue
+            logging.warning(f"百度翻译返回错误: {result.get('error_code')} {result.get('error_msg')}")
+            return None
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests_sent,
+            "sentences": self.sentences,
+            "rate_limited": self.rate_limited,
+            "throttled_seconds": round(self.limiter.waited, 3),
+        }
+
+    def close(self):
+        self.session.close()
@@ -1,4 +1,9 @@
+import asyncio
 import importlib
+from core.util.tts_scheduler import TTSScheduler
+from core.util.audio_cache import AudioCache, AudioBroadcast
+from core.util.audio import pcm_to_wav, wav_to_pcm
+from core.util.inflight import Inflight
 
 
 class TTS:
@@ -9,6 +14,9 @@ class TTS:
             def generate_audio(self, text: str, **kwargs) -> bytes:
                 ...
         generate_audio方法用于生成音频数据。
+        Client 还可以实现 stream_audio(text, **kwargs)，逐片 yield 16-bit 单声道 PCM（采样率为 Client.sample_rate），
+        以支持边合成边输出；未实现时退化为整句合成。
+        外部应通过 stream() / synthesize() 调用，由进程级调度器统一排队，而不是直接调用 provider。
     """
     def __init__(self, config: dict) -> None:
         # 1. 获取配置中的模块名
@@ -32,6 +40,134 @@ class TTS:
 
         self.provider = client_class(**tts_config)
 
+        # 进程级调度器：跨会话公平排队 + 并发上限 + 队列深度限制
+        # 未配置并发数时，按 provider 自身可并行的合成数（如 Genie worker 数、每个模型的副本数）决定
+        scheduler_config = dict(config.get("scheduler", {}))
+        scheduler_config.setdefault("max_concurrency", getattr(self.provider, "max_concurrency", 1))
+        scheduler_config.setdefault("max_per_model", getattr(self.provider, "max_per_model", 0))
+        self.scheduler = TTSScheduler(**scheduler_config)
+
+        # 音频缓存：重复的台词直接复用，跨会话的相同请求只合成一次
+        cache_config = dict(config.get("cache", {}))
+        self.cache = AudioCache(**cache_config) if cache_config.pop("enabled", True) else None
+
+        # 流式输出：首片尽量小以便尽快开播，之后用较大的分片
+        stream_config = config.get("stream", {})
+        self.streaming = stream_config.get("enabled", True) and hasattr(self.provider, "stream_audio")
+        self.first_chunk_ms = stream_config.get("first_chunk_ms", 400)
+        self.chunk_ms = stream_config.get("chunk_ms", 1500)
+
+        # 进行中的合成数，热重载时旧实例等它们结束再关闭
+        self.inflight = Inflight()
+
+    async def stream(self, text: str, session_id: str, priority=None, **kwargs):
+        """合成音频并逐片产出 (pcm, sample_rate)，输出期间计入进行中的调用，详见 _stream()"""
+        with self.inflight:
+            async for chunk in self._stream(text, session_id, priority, **kwargs):
+                yield chunk
+
+    async def _stream(self, text: str, session_id: str, priority=None, **kwargs):
+        """
+        合成音频并逐片产出 (pcm, sample_rate)。
+        依次尝试：音频缓存 -> 复用其他会话正在进行的同一合成 -> 经调度器排队新合成。
+        priority 是这句话的播放截止顺序，调度器在会话内按它排序。
+        本会话的队列已满时抛出 TTSBusyError，调用方可降级为不出声；
+        排队在登记共享之前完成，一个会话被拒绝不会影响复用同一合成的其他会话。
+        """
+        key = AudioCache.make_key(text, kwargs) if self.cache else None
+        if self.cache:
+            cached = await self.cache.get(key)
+            if cached:
+                pcm, sample_rate, _, _ = wav_to_pcm(cached)
+                async for chunk in self._rechunk(self._replay(pcm, sample_rate)):
+                    yield chunk
+                return
+
+        broadcast = self.cache.inflight.get(key) if self.cache else None
+        if broadcast and not broadcast.abandoned:
+            self.cache.coalesced += 1
+        else:
+            broadcast = AudioBroadcast()
+            # 按模型限制并发：有模型目录时按目录区分，否则按角色名
+            model = kwargs.get("onnx_model_dir") or kwargs.get("character_name")
+            job = self.scheduler.submit(session_id, self._work(broadcast, text, kwargs), priority=priority, model=model)
+            broadcast.producer = asyncio.ensure_future(self._produce(broadcast, key, job))
+            if self.cache:
+                self.cache.inflight[key] = broadcast
+
+        async for chunk in self._rechunk(broadcast.subscribe()):
+            yield chunk
+
+    async def synthesize(self, text: str, session_id: str, **kwargs) -> bytes | None:
+        """合成整句，返回 WAV 字节"""
+        pcm, sample_rate = [], None
+        async for chunk, sample_rate in self.stream(text, session_id, **kwargs):
+            pcm.append(chunk)
+        return pcm_to_wav(b"".join(pcm), sample_rate) if pcm else None
+
+    def _work(self, broadcast: AudioBroadcast, text: str, kwargs: dict):
+        """构造交给调度器线程执行的合成函数，产出的 PCM 推给 broadcast"""
+        loop = asyncio.get_running_loop()
+
+        def work():
+            # 运行在调度器线程中，分片通过 call_soon_threadsafe 交回事件循环
+            if self.streaming:
+                for pcm in self.provider.stream_audio(text, **kwargs):
+                    loop.call_soon_threadsafe(broadcast.push, pcm, self.provider.sample_rate)
+            else:
+                audio_data = self.provider.generate_audio(text, **kwargs)
+                if audio_data:
+                    pcm, sample_rate, _, _ = wav_to_pcm(audio_data)
+                    loop.call_soon_threadsafe(broadcast.push, pcm, sample_rate)
+
+        return work
+
+    async def _produce(self, broadcast: AudioBroadcast, key: str, job: asyncio.Future):
+        """等待调度器执行合成，完成后结束广播并写入缓存；被取消时连同尚未开始的任务一起撤回"""
+        try:
+            # work 里排入的 push 先于调度结果回到事件循环，返回时所有分片都已推送
+            await job
+            broadcast.finish()
+            if self.cache and broadcast.chunks:
+                sample_rate = broadcast.chunks[0][1]
+                await self.cache.put(key, pcm_to_wav(b"".join(c for c, _ in broadcast.chunks), sample_rate))
+        except asyncio.CancelledError:
+            broadcast.finish(None)
+        except Exception as e:
+            broadcast.finish(e)
+        finally:
+            if self.cache and self.cache.inflight.get(key) is broadcast:
+                del self.cache.inflight[key]
+
+    @staticmethod
+    async def _replay(pcm: bytes, sample_rate: int):
+        yield pcm, sample_rate
+
+    async def _rechunk(self, source):
+        """
+        重新切分 PCM：第一片不超过 first_chunk_ms，之后每片不超过 chunk_ms。
+        只切不攒，收到的数据会立即全部产出，不会为了凑满分片而等待。
+        """
+        first = True
+        async for pcm, sample_rate in source:
+            if not self.streaming:
+                yield pcm, sample_rate
+                continue
+            view = memoryview(pcm)
+            while view:
+                ms = self.first_chunk_ms if first else self.chunk_ms
+                limit = max(2, int(sample_rate * ms / 1000) * 2)  # 16-bit 单声道，按采样对齐
+                yield bytes(view[:limit]), sample_rate
+                view = view[limit:]
+                first = False
+
+    def close(self):
+        """释放调度器线程池和 provider 持有的资源（如 Genie worker 进程）"""
+        self.scheduler.close()
+        close = getattr(self.provider, "close", None)
+        if close:
+            return close()
+
     def __getattr__(self, name):
         """
         核心魔法：将 TTS 实例的方法调用转发给内部的 provider 实例。
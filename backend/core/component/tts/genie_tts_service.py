@@ -1,37 +1,150 @@
 import os
+import asyncio
 import logging
 import tempfile
+import threading
 from pathlib import Path
+from core.util.audio import pcm_to_wav, wav_to_pcm
+
+# Genie 输出 32kHz 单声道 16-bit PCM
+SAMPLE_RATE = 32000
+
+# 每个合成线程复用一个事件循环来驱动 genie.tts_async，避免每句话新建事件循环
+_thread_local = threading.local()
+
+# 不得不落盘时优先使用内存文件系统
+_TMP_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def _set_reference(genie, char_name: str, ref_path: str = None, ref_text: str = None):
+    # 如果提供了参考音频，则设置参考音频
+    if ref_path and ref_text:
+        genie.set_reference_audio(
+            character_name=char_name,
+            audio_path=ref_path,
+            audio_text=ref_text,
+        )
+        logging.info(f"参考音频已设置 ({char_name}): {ref_path}")
+
+
+def synthesize(genie, char_name: str, text: str, ref_path: str = None, ref_text: str = None) -> bytes:
+    """
+    用已加载的 genie 模块合成一句话，返回 WAV 字节。
+    主进程和 worker 进程共用这段逻辑。
+    """
+    if not hasattr(genie, "tts_async"):
+        _set_reference(genie, char_name, ref_path, ref_text)
+        return _synthesize_via_file(genie, char_name, text)
+
+    # 内存路径：直接收集 genie 回调出来的 PCM 分片，不经过磁盘
+    pcm = b"".join(stream_pcm(genie, char_name, text, ref_path, ref_text, split=False))
+    return pcm_to_wav(pcm, SAMPLE_RATE) if pcm else None
+
+
+def stream_pcm(genie, char_name: str, text: str, ref_path: str = None, ref_text: str = None, split: bool = True):
+    """
+    流式合成：逐个产出 16-bit PCM 分片。
+    split=True 时 genie 会按小句切分，每合成完一小句就产出一片，不必等整句结束。
+    """
+    _set_reference(genie, char_name, ref_path, ref_text)
+
+    if not hasattr(genie, "tts_async"):
+        audio_data = _synthesize_via_file(genie, char_name, text)
+        if audio_data:
+            yield wav_to_pcm(audio_data)[0]
+        return
+
+    agen = genie.tts_async(character_name=char_name, text=text, play=False, split_sentence=split)
+    try:
+        while True:
+            try:
+                yield _run_in_thread_loop(agen.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        _run_in_thread_loop(agen.aclose())
+
+
+def _run_in_thread_loop(coro):
+    """在当前线程专属的事件循环中执行协程"""
+    loop = getattr(_thread_local, "loop", None)
+    if loop is None:
+        loop = _thread_local.loop = asyncio.new_event_loop()
+    return loop.run_until_complete(coro)
+
+
+def _synthesize_via_file(genie, char_name: str, text: str) -> bytes:
+    """兼容旧版 genie（只能保存到文件）：临时文件放在 tmpfs 上"""
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False, dir=_TMP_DIR) as tmp_file:
+        tmp_path = tmp_file.name
+
+    try:
+        # 使用 genie.tts 生成音频
+        genie.tts(
+            character_name=char_name,
+            text=text,
+            play=False,
+            save_path=tmp_path
+        )
+
+        with open(tmp_path, 'rb') as f:
+            audio_data = f.read()
+        return audio_data
+
+    finally:
+        # 清理临时文件
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
 
 
 class Client:
     """
     Genie TTS 客户端 - 简化版，仅保留注册和生成功能
+    workers > 0 时使用多进程 worker 池合成，每个角色模型常驻在 replicas 个 worker 上（0 表示全部 worker），
+    可以吃满多核 CPU，流式合成的分片从 worker 边合成边传回；
+    workers = 0 时在主进程内合成（Genie 在单进程内只能串行合成）。
     """
-    
-    def __init__(self, 
-                 genie_data_dir: str = "", 
-                 language: str = "ja", 
+
+    def __init__(self,
+                 genie_data_dir: str = "",
+                 language: str = "ja",
                  onnx_model_dir: str = "",
+                 workers: int = 0,
+                 replicas: int = 1,
                  **kwargs):
         # 获取项目根目录 (MAHO)
         self.project_root = Path(__file__).resolve().parents[4]
         self.default_lang = language
-        
+
         # 处理 GenieData 目录路径
         if not genie_data_dir:
             # 默认路径：backend/models/GenieData
             genie_data_dir = str(self.project_root / "backend" / "models" / "GenieData")
         elif not Path(genie_data_dir).is_absolute():
             genie_data_dir = str(self.project_root / genie_data_dir)
-        
-        # 设置 GENIE_DATA_DIR 环境变量（必须在导入 genie_tts 之前）
-        os.environ["GENIE_DATA_DIR"] = genie_data_dir
-        logging.info(f"GENIE_DATA_DIR 已设置为: {genie_data_dir}")
-        
-        # 导入 genie_tts
-        import genie_tts as genie
-        self.genie = genie
+
+        # 已加载的角色模型: char_name -> 模型目录，避免同一模型被重复加载
+        self._loaded_characters = {}
+        self._register_lock = threading.Lock()
+
+        self.pool = None
+        self.genie = None
+        self.sample_rate = SAMPLE_RATE
+        if workers > 0:
+            from core.component.tts.genie_worker import GenieWorkerPool
+            self.pool = GenieWorkerPool(workers, genie_data_dir, replicas)
+            # 调度器按 worker 数决定可并行的合成数，同一模型最多同时用上它的全部副本
+            self.max_concurrency = workers
+            self.max_per_model = self.pool.replicas
+        else:
+            # 设置 GENIE_DATA_DIR 环境变量（必须在导入 genie_tts 之前）
+            os.environ["GENIE_DATA_DIR"] = genie_data_dir
+            logging.info(f"GENIE_DATA_DIR 已设置为: {genie_data_dir}")
+
+            # 导入 genie_tts
+            import genie_tts as genie
+            self.genie = genie
+            self.max_concurrency = 1
 
         # 如果配置中有默认模型目录，先注册一个默认角色 'maho'
         if onnx_model_dir:
@@ -39,22 +152,40 @@ class Client:
 
     def register_character(self, char_name: str, model_dir: str, language: str = None):
         """
-        在 Genie 中加载/注册一个人物
+        在 Genie 中加载/注册一个人物，同一角色同一模型目录只会加载一次
         """
         # 处理模型路径
         path_obj = Path(model_dir)
         if not path_obj.is_absolute():
             path_obj = self.project_root / model_dir
-        
+
         real_model_dir = str(path_obj)
         lang = language or self.default_lang
-        
-        logging.info(f"正在注册角色: {char_name}, 模型路径: {real_model_dir}, 语言: {lang}")
-        self.genie.load_character(
-            character_name=char_name,
-            onnx_model_dir=real_model_dir,
-            language=lang
-        )
+
+        with self._register_lock:
+            if self._loaded_characters.get(char_name) == real_model_dir:
+                logging.info(f"角色 {char_name} 的模型已加载，跳过")
+                return
+
+            logging.info(f"正在注册角色: {char_name}, 模型路径: {real_model_dir}, 语言: {lang}")
+            if self.pool:
+                self.pool.load_character(char_name, real_model_dir, lang)
+            else:
+                self.genie.load_character(
+                    character_name=char_name,
+                    onnx_model_dir=real_model_dir,
+                    language=lang
+                )
+            self._loaded_characters[char_name] = real_model_dir
+
+    def _resolve_reference(self, reference_audio_path: str = None, reference_audio_text: str = None) -> str | None:
+        """处理参考音频路径，未配置参考音频时返回 None"""
+        if not (reference_audio_path and reference_audio_text):
+            return None
+        ref_path = Path(reference_audio_path)
+        if not ref_path.is_absolute():
+            ref_path = self.project_root / reference_audio_path
+        return str(ref_path)
 
     def generate_audio(self, text: str, character_name: str = None, reference_audio_path: str = None, reference_audio_text: str = None, **kwargs) -> bytes | None:
         """
@@ -62,43 +193,30 @@ class Client:
         """
         # 获取角色名，默认使用 'maho'
         char_name = character_name or "maho"
-        
+        ref_path = self._resolve_reference(reference_audio_path, reference_audio_text)
+
         try:
-            # 如果提供了参考音频，则设置参考音频
-            if reference_audio_path and reference_audio_text:
-                # 处理音频路径
-                ref_path = Path(reference_audio_path)
-                if not ref_path.is_absolute():
-                    ref_path = self.project_root / reference_audio_path
-                
-                self.genie.set_reference_audio(
-                    character_name=char_name,
-                    audio_path=str(ref_path),
-                    audio_text=reference_audio_text,
-                )
-                logging.info(f"参考音频已设置 ({char_name}): {ref_path}")
-            
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
-                tmp_path = tmp_file.name
-            
-            try:
-                # 使用 genie.tts 生成音频
-                self.genie.tts(
-                    character_name=char_name,
-                    text=text,
-                    play=False,
-                    save_path=tmp_path
-                )
-                
-                with open(tmp_path, 'rb') as f:
-                    audio_data = f.read()
-                return audio_data
-                
-            finally:
-                # 清理临时文件
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
-                    
+            if self.pool:
+                pcm = b"".join(self.pool.stream(char_name, text, ref_path, reference_audio_text))
+                return pcm_to_wav(pcm, SAMPLE_RATE) if pcm else None
+            return synthesize(self.genie, char_name, text, ref_path, reference_audio_text)
         except Exception as e:
             logging.error(f"TTS 生成失败 ({char_name}): {e}")
             return None
+
+    def stream_audio(self, text: str, character_name: str = None, reference_audio_path: str = None, reference_audio_text: str = None, **kwargs):
+        """
+        流式生成音频，逐片产出 PCM（采样率见 sample_rate）。
+        """
+        char_name = character_name or "maho"
+        ref_path = self._resolve_reference(reference_audio_path, reference_audio_text)
+
+        if self.pool:
+            yield from self.pool.stream(char_name, text, ref_path, reference_audio_text)
+            return
+        yield from stream_pcm(self.genie, char_name, text, ref_path, reference_audio_text)
+
+    def close(self):
+        """关闭 worker 进程池"""
+        if self.pool:
+            self.pool.shutdown()
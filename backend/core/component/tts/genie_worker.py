@@ -0,0 +1,161 @@
+"""
+Genie TTS 多进程 worker 池。
+
+每个 worker 是一个独立进程，启动后各自导入 genie_tts。角色模型按 replicas 分片常驻：
+每个模型只加载到 replicas 个 worker 上（优先放到已加载模型最少的 worker），
+合成请求被路由到持有该模型且负载最低的 worker，worker 数多于副本数时不必每个进程都加载全部模型。
+合成是流式的：worker 每合成出一小句就把 PCM 写入一块共享内存，经该 worker 专属的管道把位置发回主进程，
+主进程边收边产出，不必等整句合成完，也避免大块 bytes 在进程间序列化。
+"""
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+# ---- 以下在 worker 进程内执行 ----
+
+_genie = None
+_conn = None  # 发送 PCM 分片位置的管道写端
+_loaded = {}  # char_name -> 模型目录
+
+
+def _init_worker(genie_data_dir: str, conn):
+    """worker 进程初始化：设置 GENIE_DATA_DIR 后导入 genie_tts"""
+    global _genie, _conn
+    os.environ["GENIE_DATA_DIR"] = genie_data_dir
+    import genie_tts as genie
+    _genie = genie
+    _conn = conn
+
+
+def _load_character(char_name: str, model_dir: str, language: str):
+    if _loaded.get(char_name) == model_dir:
+        return
+    _genie.load_character(character_name=char_name, onnx_model_dir=model_dir, language=language)
+    _loaded[char_name] = model_dir
+
+
+def _stream(char_name: str, text: str, ref_path: str, ref_text: str):
+    """
+    流式合成：每产出一片 PCM 就写入一块新的共享内存，经管道发送 (共享内存名, 字节数)，
+    最后发送 None 作为结束标记（出错时也发送，异常经 future 传回）。
+    """
+    from core.component.tts.genie_tts_service import stream_pcm
+
+    try:
+        for pcm in stream_pcm(_genie, char_name, text, ref_path, ref_text):
+            if not pcm:
+                continue
+            shm = SharedMemory(create=True, size=len(pcm))
+            shm.buf[:len(pcm)] = pcm
+            # 只关闭本进程的映射，由主进程读取后 unlink
+            shm.close()
+            _conn.send((shm.name, len(pcm)))
+    finally:
+        _conn.send(None)
+
+
+# ---- 以下在主进程内执行 ----
+
+class GenieWorkerPool:
+    """
+    Genie worker 进程池。
+    每个 worker 用一个单进程的 ProcessPoolExecutor 表示，这样可以精确地把请求发给指定 worker；
+    worker 同一时间只执行一个任务，所以它的管道上只有当前任务的分片。
+    replicas 为每个模型加载到的 worker 数，0 表示所有 worker 都加载。
+    """
+
+    def __init__(self, workers: int, genie_data_dir: str, replicas: int = 1):
+        ctx = multiprocessing.get_context("spawn")
+        self.workers = []
+        self.conns = []  # 每个 worker 的管道读端
+        for _ in range(workers):
+            reader, writer = ctx.Pipe(duplex=False)
+            self.workers.append(ProcessPoolExecutor(max_workers=1, mp_context=ctx,
+                                                    initializer=_init_worker, initargs=(genie_data_dir, writer)))
+            self.conns.append(reader)
+        self.replicas = min(replicas, workers) if replicas > 0 else workers
+        self.inflight = [0] * workers
+        self.models = [set() for _ in range(workers)]  # 每个 worker 已加载的角色
+        self.residency = {}  # char_name -> 已加载该模型的 worker 下标集合
+        self._lock = threading.Lock()
+        logging.info(f"Genie worker 池已创建，worker 数: {workers}，每个模型副本数: {self.replicas}")
+
+    def load_character(self, char_name: str, model_dir: str, language: str):
+        """把角色模型加载到 replicas 个 worker 上；已分配过的角色在原来的 worker 上重新加载"""
+        with self._lock:
+            holders = self.residency.get(char_name)
+            if not holders:
+                order = sorted(range(len(self.workers)), key=lambda i: (len(self.models[i]), i))
+                holders = set(order[:self.replicas])
+        futures = [self.workers[i].submit(_load_character, char_name, model_dir, language) for i in holders]
+        for future in futures:
+            future.result()
+        with self._lock:
+            self.residency[char_name] = holders
+            for i in holders:
+                self.models[i].add(char_name)
+
+    def _pick(self, char_name: str) -> int:
+        """在持有该模型的 worker 中选负载最低的一个"""
+        with self._lock:
+            holders = self.residency.get(char_name)
+            if not holders:
+                raise ValueError(f"角色 {char_name} 尚未注册")
+            index = min(holders, key=lambda i: self.inflight[i])
+            self.inflight[index] += 1
+            return index
+
+    def stream(self, char_name: str, text: str, ref_path: str = None, ref_text: str = None):
+        """流式合成，逐片产出 16-bit PCM；提前停止迭代时仍会收完并释放剩余分片"""
+        index = self._pick(char_name)
+        try:
+            conn = self.conns[index]
+            future = self.workers[index].submit(_stream, char_name, text, ref_path, ref_text)
+            finished = False
+            try:
+                while True:
+                    location = self._recv(conn, future)
+                    if location is None:
+                        finished = True
+                        break
+                    yield self._read(location)
+            finally:
+                # 消费方中途放弃：收完这次任务剩下的分片，保证管道上不残留到下一个任务
+                while not finished:
+                    location = self._recv(conn, future)
+                    if location is None:
+                        break
+                    self._read(location)
+            future.result()  # 传回 worker 中的异常
+        finally:
+            with self._lock:
+                self.inflight[index] -= 1
+
+    @staticmethod
+    def _recv(conn, future):
+        """读取下一片的位置；worker 进程异常退出（没有发送结束标记）时返回 None"""
+        while not conn.poll(0.5):
+            if future.done():
+                if conn.poll(0):
+                    break
+                return None
+        return conn.recv()
+
+    @staticmethod
+    def _read(location) -> bytes:
+        name, size = location
+        shm = SharedMemory(name=name)
+        try:
+            return bytes(shm.buf[:size])
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def shutdown(self):
+        for worker in self.workers:
+            worker.shutdown(wait=False, cancel_futures=True)
+        for conn in self.conns:
+            conn.close()
@@ -0,0 +1,44 @@
+import base64
+import json
+from core.handler.protocol import FRAME_AUDIO_OUT, encode_frame
+
+# 每帧只在这里序列化一次：文本增量要先经编排器合并成帧，所以不在角色产出时提前序列化。
+# orjson（requirements.txt 已包含）快数倍，未安装时退回标准库；
+# 两者都输出不转义的 UTF-8，中文比 \uXXXX 转义小一半
+try:
+    import orjson
+
+    def dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+class Connection:
+    """
+    对单个 WebSocket 连接的发送端封装，记录协商结果并按协议序列化输出。
+    音频项的 data 是原始字节：二进制模式下直接作为二进制帧发送，旧协议下再转 Base64 放进 JSON。
+    """
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.binary = False  # 是否已协商二进制音频帧
+        self._audio_seq = {}  # 角色名 -> 下一个音频帧序号
+
+    async def send(self, item: dict):
+        """发送一条输出项"""
+        if item.get("type") == "audio":
+            await self._send_audio(item)
+        else:
+            await self.websocket.send_text(dumps(item))
+
+    async def _send_audio(self, item: dict):
+        character = item.get("character", "")
+        data = item.get("data", b"")
+        if self.binary:
+            seq = self._audio_seq.get(character, 0)
+            self._audio_seq[character] = seq + 1
+            await self.websocket.send_bytes(
+                encode_frame(FRAME_AUDIO_OUT, data, character, seq, item.get("is_final", False)))
+        else:
+            await self.websocket.send_text(dumps(dict(item, data=base64.b64encode(data).decode())))
@@ -0,0 +1,50 @@
+"""
+WebSocket 二进制帧协议。
+
+连接建立后客户端发送 {"type": "hello", "binary": true, "token": "..."} 协商，
+服务端回复 {"type": "hello", "binary": true} 后，双方的音频改用二进制帧传输，控制消息仍然是 JSON 文本帧。
+未协商的旧客户端继续使用 JSON + Base64 音频。
+hello 中还可带上 "audio": {"format": "mulaw", "sample_rate": 16000} 指定输出音频编码（见 core/util/audio.py 的 AudioEncoder），
+服务端在回复中给出实际生效的格式。
+
+帧格式（大端）:
+    1 字节  帧类型   FRAME_AUDIO_OUT / FRAME_AUDIO_IN
+    1 字节  标志位   bit0 = is_final
+    4 字节  序号     同一角色的音频帧递增
+    1 字节  角色名长度 N
+    N 字节  角色名 (UTF-8)
+    其余    音频数据
+"""
+import struct
+
+FRAME_AUDIO_OUT = 1  # 服务端 -> 客户端：角色语音
+FRAME_AUDIO_IN = 2   # 客户端 -> 服务端：麦克风音频
+
+FLAG_FINAL = 0x01
+
+HEADER = struct.Struct("!BBIB")
+
+
+def encode_frame(frame_type: int, payload, character: str = "", seq: int = 0, is_final: bool = False) -> bytes:
+    name = character.encode("utf-8")
+    flags = FLAG_FINAL if is_final else 0
+    return b"".join((HEADER.pack(frame_type, flags, seq & 0xFFFFFFFF, len(name)), name, payload))
+
+
+def decode_frame(data: bytes) -> tuple[int, bool, int, str, memoryview]:
+    """
+    解析二进制帧，返回 (帧类型, is_final, 序号, 角色名, 音频数据)。
+    音频数据是 memoryview 切片，不产生拷贝。
+    帧过短、帧类型未知或角色名不是合法 UTF-8 时抛出 ValueError。
+    """
+    view = memoryview(data)
+    if len(view) < HEADER.size:
+        raise ValueError(f"二进制帧过短: {len(view)} 字节")
+    frame_type, flags, seq, name_len = HEADER.unpack_from(view)
+    if frame_type not in (FRAME_AUDIO_OUT, FRAME_AUDIO_IN):
+        raise ValueError(f"未知的帧类型: {frame_type}")
+    offset = HEADER.size
+    if len(view) < offset + name_len:
+        raise ValueError("二进制帧角色名长度超出帧长")
+    character = bytes(view[offset:offset + name_len]).decode("utf-8")
+    return frame_type, bool(flags & FLAG_FINAL), seq, character, view[offset + name_len:]
@@ -1,6 +1,8 @@
 from core.auth.login import AuthManager
 from core.Character import Character
 from core.Director import Director
+from core.handler.connection import Connection
+from core.handler.protocol import FRAME_AUDIO_IN, decode_frame
 from starlette.websockets import WebSocketDisconnect
 import logging
 import asyncio
@@ -16,14 +18,16 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 class WSHandler():
     """
     负责处理 WebSocket 连接，接收消息并通过 Components 实例进行处理，
-    每个websocket连接对应一个 Components 实例，确保用户隔离。
+    每个websocket连接对应一个 SessionComponents 会话视图（共享重量级组件，隔离 ASR 等用户状态），确保用户隔离。
     """
 
-    def __init__(self):
-        self.auth_manager = AuthManager()  # 用于验证 WebSocket 消息中的 token
+    def __init__(self, auth_manager: AuthManager = None):
+        self.auth_manager = auth_manager or AuthManager()  # 用于验证 WebSocket 连接的 token
         self.orchestrator_task = None      # 演出编排任务
         self.characters = {}               # 存储当前连接的所有角色实例
         self.director = None               # 导演实例
+        self.connection = None             # 连接发送端（负责协议协商后的序列化）
+        self.authenticated = False         # 连接是否已认证：首条消息验证 token，之后不再逐条验证
 
     def init_characters(self, components):
         """初始化角色列表"""
@@ -42,13 +46,15 @@ class WSHandler():
                 name = conf.get("name")
                 if name:
                     self.characters[name] = Character(name, conf, components)
+        # 交给会话视图，供 /api/metrics 汇总各角色的队列水位
+        components.characters = self.characters
 
-    def _validate_token(self, msg):
+    async def _validate_token(self, msg):
         """验证消息中的 token"""
         token = msg.get("token")
-        return token and self.auth_manager.verify_token(token)
+        return token and await self.auth_manager.averify_token(token)
 
-    async def interrupt_chat(self, websocket):
+    async def interrupt_chat(self):
         """中断当前对话：取消所有角色任务，清空队列，通知前端"""
         # 1. 中断所有角色（取消生成任务 + 清空队列）
         for name, character in self.characters.items():
@@ -57,45 +63,97 @@ class WSHandler():
             await self.director.remove_from_queue(name)
 
         # 2. 通知前端清理状态
-        await websocket.send_text(json.dumps({"type": "end"}))
+        await self.connection.send({"type": "end"})
         logging.info("已中断当前对话")
 
     async def _dispatch_chat(self, user_text: str):
         """
         处理用户输入，由导演决定谁该说话，并并行触发角色的生成任务。
         这是 chat 和 ASR 的统一入口。
+        需要询问 LLM 才能决定时，先让最可能回复的角色开始生成（输出在注册台词前不会演出），
+        猜中就省下路由的等待时间，猜错则撤销它的这轮对话。
         """
         if not user_text:
             return
             
         available_chars = list(self.characters.keys())
-        
-        # 1. 由导演决定谁该说话
-        instructions = await self.director.dispatch_intent(user_text, available_chars)
-        
-        # 2. 生成当前情境上下文（供角色参考，不存入角色历史）
+        self.director.record_user_input(user_text)
+
+        # 生成当前情境上下文（供角色参考，不存入角色历史）
         situation = self.director.get_situation_context()
-        
-        # 3. 并行触发所有相关角色的生成任务
-        for cmd in instructions:
-            character = self.characters.get(cmd["character"])
-            if character:
-                # 角色自己管理任务生命周期，无需 WSHandler 保存引用
-                asyncio.create_task(character.chat(cmd["text"], extra_context=situation))
-
-    async def _handle_audio(self, components, msg):
+
+        # 1. 由导演决定谁该说话，能直接决定时不投机
+        targets = self.director.quick_route(user_text, available_chars)
+        speculative = None
+        if targets is None:
+            name = self.director.predict_speaker(available_chars) if self.director.speculative else None
+            if name in self.characters:
+                speculative = self.characters[name]
+                history_length = len(speculative.history)
+                await speculative.start_chat(user_text, extra_context=situation, rank=self.director.next_rank())
+            targets = await self.director.slow_route(user_text, available_chars)
+
+        if speculative:
+            stats = self.director.components.route_stats
+            if speculative.name in targets:
+                stats["speculation_hit"] += 1
+                # 投机角色已经在生成（并占了 TTS 资源锁的队首），让它先演出；
+                # 否则它的输出队列填满后会和排在前面、等着锁的角色互相等待
+                targets = [speculative.name] + [name for name in targets if name != speculative.name]
+            else:
+                stats["speculation_miss"] += 1
+                await speculative.discard_chat(history_length)
+
+        # 2. 按顺序触发其余相关角色的生成任务（角色自己记录任务，打断时取消）。
+        #    还在回复上一轮的角色会先被中断，所以要在注册台词之前启动，台词才能记下这一轮的代次
+        for name in targets:
+            character = self.characters.get(name)
+            if character and character is not speculative:
+                await character.start_chat(user_text, extra_context=situation, rank=self.director.next_rank())
+
+        # 3. 注册台词后，各角色的输出按顺序演出
+        await self.director.commit(user_text, targets, self.characters)
+
+    async def _handle_audio(self, components, chunk: bytes, is_final: bool):
         """处理语音/音频数据流"""
         # 设置回调：识别成功后直接走统一的文本处理逻辑
         components.asr.set_callback(self._dispatch_chat)
-            
+
         try:
-            audio_data = msg.get("data")
-            is_final = msg.get("is_final", False)
-            chunk = base64.b64decode(audio_data) if audio_data else b""
             await components.asr.send_audio(chunk, is_final=is_final)
         except Exception as e:
             logging.error(f"ASR 处理失败: {e}")
 
+    async def _handle_hello(self, components, msg):
+        """协议协商：客户端声明支持二进制音频帧时切换到二进制模式，并可指定音频输出格式"""
+        self.connection.binary = bool(msg.get("binary"))
+        if isinstance(msg.get("audio"), dict):
+            components.set_audio_format(msg["audio"])
+        encoder = components.audio_encoder
+        await self.connection.send({
+            "type": "hello",
+            "binary": self.connection.binary,
+            "audio": {"format": encoder.format, "sample_rate": encoder.sample_rate},
+        })
+        logging.info(f"协议协商完成，二进制音频帧: {self.connection.binary}，音频格式: {encoder.format}")
+
+    async def _handle_binary(self, components, data: bytes):
+        """处理二进制帧（目前只有麦克风音频）"""
+        if not self.authenticated:
+            logging.warning("接收到未握手连接的二进制帧")
+            await self.connection.send({"type": "error", "message": "无效的 token"})
+            return
+
+        try:
+            frame_type, is_final, _, _, payload = decode_frame(data)
+        except ValueError as e:
+            # 畸形帧只回复错误，不断开连接
+            logging.warning(f"无效的二进制帧: {e}")
+            await self.connection.send({"type": "error", "message": "无效的二进制帧"})
+            return
+        if frame_type == FRAME_AUDIO_IN:
+            await self._handle_audio(components, bytes(payload), is_final)
+
     async def handle_ws(self, websocket, components):
         """
         这里主要是接收数据
@@ -111,31 +169,46 @@ class WSHandler():
         logging.info(f"已加载角色: {list(self.characters.keys())}")
 
         # 启动演出编排器后台任务 (现在由导演驱动)
-        self.orchestrator_task = asyncio.create_task(self.director.run_orchestrator(websocket, self.characters))
+        self.connection = Connection(websocket)
+        self.orchestrator_task = asyncio.create_task(self.director.run_orchestrator(self.connection, self.characters))
 
         try:
             # 主循环：接收消息并处理
             while True:
-                data = await websocket.receive_text()
-                msg = json.loads(data)
-                
-                # 统一验证 token
-                if not self._validate_token(msg):
-                    logging.warning(f"接收到未授权的消息")
-                    await websocket.send_text(json.dumps({"type": "error", "message": "无效的 token"}))
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+
+                if message.get("bytes") is not None:
+                    await self._handle_binary(components, message["bytes"])
                     continue
+
+                msg = json.loads(message["text"])
+                
+                # 每个连接只验证一次 token（通常在 hello 握手时），之后的消息不再重复验证
+                if not self.authenticated:
+                    if not await self._validate_token(msg):
+                        logging.warning(f"接收到未授权的消息")
+                        await websocket.send_text(json.dumps({"type": "error", "message": "无效的 token"}))
+                        continue
+                    self.authenticated = True
                 
                 msg_type = msg.get("type")
 
-                if msg_type == "chat":
+                if msg_type == "hello":
+                    await self._handle_hello(components, msg)
+
+                elif msg_type == "chat":
                     user_text = msg.get("data")
                     await self._dispatch_chat(user_text)
                 
                 elif msg_type == "audio":
-                    await self._handle_audio(components, msg)
+                    audio_data = msg.get("data")
+                    chunk = base64.b64decode(audio_data) if audio_data else b""
+                    await self._handle_audio(components, chunk, msg.get("is_final", False))
                 
                 elif msg_type == "interrupt":
-                    await self.interrupt_chat(websocket)
+                    await self.interrupt_chat()
 
         except WebSocketDisconnect:
             logging.info("WebSocket 已断开")
@@ -0,0 +1,167 @@
+import io
+import struct
+import wave
+import numpy as np
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int, channels: int = 1, sample_width: int = 2) -> bytes:
+    """把原始 PCM 数据封装为 WAV 字节（全程在内存中完成）"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(sample_width)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def wav_to_pcm(data: bytes) -> tuple[bytes, int, int, int]:
+    """
+    解析 WAV 字节，返回 (PCM 数据, 采样率, 声道数, 采样字节数)
+    """
+    with wave.open(io.BytesIO(data), 'rb') as wf:
+        return wf.readframes(wf.getnframes()), wf.getframerate(), wf.getnchannels(), wf.getsampwidth()
+
+
+def downmix(samples: np.ndarray, channels: int) -> np.ndarray:
+    """交错排列的多声道采样取平均，混成单声道"""
+    if channels <= 1:
+        return samples
+    frames = len(samples) // channels
+    return samples[:frames * channels].reshape(frames, channels).mean(axis=1)
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """降采样一整段音频到 dst_rate（不做升采样），见 Resampler"""
+    return Resampler(src_rate, dst_rate).process(samples)
+
+
+class Resampler:
+    """
+    有状态的降采样器（不做升采样）：先用滑动平均做一次简单低通抑制混叠，再线性插值取点。
+    流式合成的一句话分成多片送来时，跨片保留滤波器的尾部采样和插值相位，
+    分片处理的拼接结果与整句一次处理相同，分片边界不会出现滤波瞬变。
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int):
+        self.src_rate = src_rate
+        self.dst_rate = dst_rate
+        self.ratio = src_rate / dst_rate if dst_rate else 1
+        self.taps = int(np.ceil(self.ratio))
+        self._kernel = np.full(self.taps, 1 / self.taps, dtype=np.float32)
+        self._history = np.zeros(max(self.taps - 1, 0), dtype=np.float32)  # 上一片末尾的输入采样
+        self._tail = np.zeros(0, dtype=np.float32)  # 上一片最后一个滤波后的采样，供跨片插值
+        self._consumed = 0  # 已处理的输入采样数
+        self._produced = 0  # 已输出的采样数
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if self.ratio <= 1 or not len(samples):
+            return samples
+        x = samples.astype(np.float32)
+        if self.taps > 1:
+            # 因果滑动平均：接上上一片末尾的 taps-1 个采样，输出与输入等长
+            extended = np.concatenate((self._history, x))
+            self._history = extended[len(extended) - (self.taps - 1):]
+            x = np.convolve(extended, self._kernel, mode="valid")
+
+        # 本片（连同上一片最后一个采样）覆盖的全局下标范围内，取所有 k * ratio 位置上的点
+        last = self._consumed + len(x) - 1
+        total = int(np.floor(last / self.ratio)) + 1
+        positions = np.arange(self._produced, total) * self.ratio
+        y = np.concatenate((self._tail, x))
+        indices = np.arange(self._consumed - len(self._tail), last + 1)
+        out = np.interp(positions, indices, y)
+
+        self._tail = x[-1:]
+        self._consumed += len(x)
+        self._produced = max(self._produced, total)
+        return out
+
+
+def mulaw_encode(samples: np.ndarray) -> np.ndarray:
+    """16-bit 线性 PCM 按 G.711 μ-law 压缩为 8-bit"""
+    BIAS, CLIP = 0x84, 32635
+    s = samples.astype(np.int32)
+    sign = (s < 0).astype(np.int32) << 7
+    magnitude = np.minimum(np.abs(s), CLIP) + BIAS
+    # magnitude 的最高有效位位置决定段号（0~7）
+    exponent = np.clip(np.frexp(magnitude)[1] - 8, 0, 7)
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8)
+
+
+def _mulaw_wav(data: bytes, sample_rate: int) -> bytes:
+    """μ-law WAV（格式码 7）。wave 模块只能写 PCM，这里手工拼文件头"""
+    fmt = struct.pack("<HHIIHHH", 7, 1, sample_rate, sample_rate, 1, 8, 0)
+    fact = struct.pack("<I", len(data))
+    body = b"".join((
+        b"WAVE",
+        b"fmt ", struct.pack("<I", len(fmt)), fmt,
+        b"fact", struct.pack("<I", len(fact)), fact,
+        b"data", struct.pack("<I", len(data)), data,
+    ))
+    if len(data) % 2:
+        body += b"\x00"
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+class AudioEncoder:
+    """
+    会话级的音频输出编码：降采样、混成单声道、量化/压缩后封装为 WAV。
+    format 可选:
+        pcm16  16-bit 线性 PCM（默认，与 TTS 输出一致）
+        pcm8   8-bit 线性 PCM，体积减半，底噪明显
+        mulaw  8-bit G.711 μ-law，体积减半，语音音质接近 16-bit
+    sample_rate 为 0 时保持原采样率；高于原采样率时同样保持不变。
+    """
+
+    FORMATS = ("pcm16", "pcm8", "mulaw")
+
+    def __init__(self, format: str = "pcm16", sample_rate: int = 0):
+        if format not in self.FORMATS:
+            raise ValueError(f"不支持的音频格式: {format}，可选 {self.FORMATS}")
+        self.format = format
+        self.sample_rate = int(sample_rate or 0)
+
+    def target_rate(self, sample_rate: int) -> int:
+        return min(self.sample_rate or sample_rate, sample_rate)
+
+    def stream(self) -> "AudioEncoderStream":
+        """为一句话（一次流式合成）创建编码上下文，各分片共用同一个降采样器"""
+        return AudioEncoderStream(self)
+
+    def encode(self, pcm: bytes, sample_rate: int, channels: int = 1, resampler: Resampler = None) -> bytes:
+        """
+        把 16-bit PCM 编码为目标格式的 WAV 字节。
+        resampler 为跨分片保留状态的降采样器（见 stream()），不传时按一整段独立处理。
+        """
+        target_rate = self.target_rate(sample_rate)
+        if self.format == "pcm16" and target_rate == sample_rate and channels == 1:
+            return pcm_to_wav(pcm, sample_rate)
+
+        samples = np.frombuffer(pcm, dtype="<i2")
+        resampler = resampler or Resampler(sample_rate, target_rate)
+        samples = resampler.process(downmix(samples, channels))
+        samples = np.clip(np.rint(samples), -32768, 32767).astype(np.int16)
+
+        if self.format == "mulaw":
+            return _mulaw_wav(mulaw_encode(samples).tobytes(), target_rate)
+        if self.format == "pcm8":
+            # 8-bit WAV 是无符号数，以 128 为零点
+            return pcm_to_wav(((samples >> 8) + 128).astype(np.uint8).tobytes(), target_rate, sample_width=1)
+        return pcm_to_wav(samples.astype("<i2").tobytes(), target_rate)
+
+
+class AudioEncoderStream:
+    """一句话的编码上下文：同一句的各个分片共用一个降采样器，分片边界不产生滤波瞬变"""
+
+    def __init__(self, encoder: AudioEncoder):
+        self.encoder = encoder
+        self.resampler = None
+
+    def encode(self, pcm: bytes, sample_rate: int, channels: int = 1) -> bytes:
+        target_rate = self.encoder.target_rate(sample_rate)
+        if (self.resampler is None or self.resampler.src_rate != sample_rate
+                or self.resampler.dst_rate != target_rate):
+            self.resampler = Resampler(sample_rate, target_rate)
+        return self.encoder.encode(pcm, sample_rate, channels, self.resampler)
@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import unicodedata
+from core.util.lru_cache import LRUCache
+
+
+class AudioBroadcast:
+    """
+    一次正在进行的合成。
+    生产方不断追加 PCM 分片，任意数量的订阅方都能从第一片开始回放并跟上实时进度；
+    所有订阅方都离开（如用户打断）且合成未完成时，取消生产任务。
+    """
+
+    def __init__(self):
+        self.chunks = []  # [(pcm, sample_rate)]
+        self.done = False
+        self.error = None
+        self.producer = None  # 生产任务，由创建方设置
+        self.subscribers = 0
+        self.abandoned = False  # 已因无人订阅而取消，不应再被复用
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def push(self, pcm: bytes, sample_rate: int):
+        if not self.done:
+            self.chunks.append((pcm, sample_rate))
+            self._notify()
+
+    def finish(self, error: BaseException = None):
+        if not self.done:
+            self.done = True
+            self.error = error
+            self._notify()
+
+    async def subscribe(self):
+        self.subscribers += 1
+        try:
+            index = 0
+            while True:
+                while index < len(self.chunks):
+                    yield self.chunks[index]
+                    index += 1
+                if self.done:
+                    if self.error:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done and self.producer:
+                self.abandoned = True
+                self.producer.cancel()
+
+
+class AudioCache:
+    """
+    TTS 音频缓存，以内容寻址：键由角色名、模型目录、参考音频及其文本、归一化后的合成文本共同决定。
+    两级存储：内存 LRU + 可选的磁盘目录，缓存的是整句的 WAV 字节。
+    正在合成中的句子登记在 inflight 里，不同会话同时请求同一句话时共享同一次合成（single-flight）。
+    """
+
+    KEY_FIELDS = ("character_name", "onnx_model_dir", "reference_audio_path", "reference_audio_text")
+
+    def __init__(self, max_entries: int = 512, max_mb: float = 64, disk_dir: str = ""):
+        self.memory = LRUCache(max_entries=max_entries, max_bytes=int(max_mb * 1024 * 1024))
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+        self.inflight = {}  # key -> AudioBroadcast
+        self.disk_hits = 0
+        self.coalesced = 0
+        self.bytes_saved = 0
+
+    @classmethod
+    def make_key(cls, text: str, tts_config: dict) -> str:
+        normalized = " ".join(unicodedata.normalize("NFKC", text).split())
+        parts = [tts_config.get(field) for field in cls.KEY_FIELDS] + [normalized]
+        return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.wav")
+
+    def _read_disk(self, key: str) -> bytes | None:
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key: str, data: bytes):
+        # 先写临时文件再替换，避免并发读到半截文件
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"TTS 缓存写入磁盘失败: {e}")
+
+    async def get(self, key: str) -> bytes | None:
+        """依次查内存和磁盘，命中返回 WAV 字节"""
+        data = self.memory.get(key)
+        if data is None and self.disk_dir:
+            data = await asyncio.to_thread(self._read_disk, key)
+            if data is not None:
+                self.disk_hits += 1
+                self.memory.put(key, data)
+        if data is not None:
+            self.bytes_saved += len(data)
+        return data
+
+    async def put(self, key: str, data: bytes):
+        self.memory.put(key, data)
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_disk, key, data)
+
+    def stats(self) -> dict:
+        stats = self.memory.stats()
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "hit_rate": round((stats["hits"] + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "disk_hits": self.disk_hits,
+            "coalesced": self.coalesced,
+            "bytes_saved": self.bytes_saved,
+            "inflight": len(self.inflight),
+        })
+        return stats
@@ -0,0 +1,62 @@
+import asyncio
+
+
+def item_size(item) -> int:
+    """估算队列项的字节数：音频、文本按 data 长度计（文本按字数近似），其余不计"""
+    data = item.get("data") if isinstance(item, dict) else item
+    if isinstance(data, (bytes, bytearray, memoryview, str)):
+        return len(data)
+    return 0
+
+
+class BoundedQueue(asyncio.Queue):
+    """
+    同时按条数和字节数限制容量的 asyncio.Queue，并记录排队峰值（high-water）。
+    已满时 put() 会等待，生产者随之暂停，背压由此逐级传回上游。
+    队列为空时总能放入一项，所以单项超过 max_bytes 也不会卡死，实际占用最多超出上限一项。
+    sizeof 用于计算单项字节数，默认 item_size()。
+    """
+
+    def __init__(self, maxsize: int = 0, max_bytes: int = 0, sizeof=item_size):
+        super().__init__(maxsize)
+        self.max_bytes = max_bytes  # 0 表示不按字节数限制
+        self.sizeof = sizeof
+        self.bytes = 0
+        self.peak_items = 0
+        self.peak_bytes = 0
+
+    def full(self) -> bool:
+        if super().full():
+            return True
+        return self.max_bytes > 0 and self.bytes >= self.max_bytes and not self.empty()
+
+    def _put(self, item):
+        super()._put(item)
+        self.bytes += self.sizeof(item)
+        self.peak_items = max(self.peak_items, self.qsize())
+        self.peak_bytes = max(self.peak_bytes, self.bytes)
+
+    def _get(self):
+        item = super()._get()
+        self.bytes -= self.sizeof(item)
+        return item
+
+    def reset(self) -> list:
+        """
+        丢弃全部排队项并清零未完成计数，返回被丢弃的项。
+        只能在没有消费者持有未完成项时调用（如角色的后台任务已停止），否则 join() 的计数会错乱。
+        """
+        items = []
+        while not self.empty():
+            items.append(self.get_nowait())
+        self._unfinished_tasks = 0
+        self._finished.set()
+        return items
+
+    def stats(self) -> dict:
+        return {
+            "items": self.qsize(),
+            "bytes": self.bytes,
+            "peak_items": self.peak_items,
+            "peak_bytes": self.peak_bytes,
+        }
@@ -1,5 +1,23 @@
 import yaml
 import os
+import asyncio
+import logging
+import threading
+from types import MappingProxyType
+
+
+def resolve_config_path(file_path):
+		"""
+		解析实际使用的配置文件路径。
+		如果data目录下存在同名配置文件，则优先使用data目录下的文件。
+		"""
+		data_dir = 'data'
+		filename = os.path.basename(file_path)
+		data_file_path = os.path.join(data_dir, filename)
+		if os.path.exists(data_file_path):
+				return data_file_path
+		return file_path
+
 
 def load_yaml(file_path):
 		"""
@@ -12,13 +30,89 @@ def load_yaml(file_path):
 		返回:
 				dict: 加载的配置字典。
 		"""
-		# 检查data目录下是否有同名文件
-		data_dir = 'data'
-		filename = os.path.basename(file_path)
-		data_file_path = os.path.join(data_dir, filename)
-		if os.path.exists(data_file_path):
-				file_path = data_file_path
-		
+		file_path = resolve_config_path(file_path)
+
 		with open(file_path, 'r', encoding='utf-8') as file:
 				config = yaml.safe_load(file)
 		return config
+
+
+def freeze(obj):
+		"""把配置递归转换为只读结构：dict -> MappingProxyType，list -> tuple"""
+		if isinstance(obj, dict):
+				return MappingProxyType({k: freeze(v) for k, v in obj.items()})
+		if isinstance(obj, list):
+				return tuple(freeze(v) for v in obj)
+		return obj
+
+
+class ConfigService:
+		"""
+		配置服务：配置文件只解析一次，之后所有会话都从内存里的只读快照读取。
+		watch() 在后台按间隔检查文件 mtime，变化时重新解析并整体替换快照，
+		再通知订阅者（如 Components 只重建配置发生变化的组件）。
+		"""
+
+		def __init__(self, file_path, interval: float = 2.0):
+				self.file_path = str(file_path)
+				self.interval = interval
+				self._listeners = []
+				self._lock = threading.Lock()
+				self._stamp = None
+				self.snapshot = self._load()
+
+		def _stat(self):
+				"""返回 (实际路径, mtime)，用于判断配置是否变化"""
+				path = resolve_config_path(self.file_path)
+				return path, os.stat(path).st_mtime_ns
+
+		def _load(self):
+				stamp = self._stat()
+				with open(stamp[0], 'r', encoding='utf-8') as file:
+						config = yaml.safe_load(file) or {}
+				self._stamp = stamp
+				logging.info(f"配置已加载: {stamp[0]}")
+				return freeze(config)
+
+		def get(self):
+				"""返回当前配置快照（只读）"""
+				return self.snapshot
+
+		def subscribe(self, callback):
+				"""注册配置变更回调，签名: callback(old_config, new_config)"""
+				self._listeners.append(callback)
+
+		def check_reload(self) -> bool:
+				"""检查配置文件是否变化，变化则重新加载并通知订阅者，返回是否发生了重载"""
+				with self._lock:
+						stamp = None
+						try:
+								stamp = self._stat()
+								if stamp == self._stamp:
+										return False
+								new_config = self._load()
+						except Exception as e:
+								# 解析失败时保留旧快照，避免半截配置生效；记下 mtime，文件再次修改前不重复报错
+								if stamp is not None:
+										self._stamp = stamp
+								logging.error(f"配置重载失败，继续使用旧配置: {e}")
+								return False
+
+						old_config = self.snapshot
+						self.snapshot = new_config
+
+				for callback in self._listeners:
+						try:
+								callback(old_config, new_config)
+						except Exception as e:
+								logging.error(f"配置变更回调执行失败: {e}")
+				return True
+
+		async def watch(self):
+				"""后台监视配置文件变化，解析和组件重建放到线程里执行，不阻塞事件循环"""
+				while True:
+						try:
+								await asyncio.sleep(self.interval)
+								await asyncio.to_thread(self.check_reload)
+						except asyncio.CancelledError:
+								break
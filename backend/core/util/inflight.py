@@ -0,0 +1,34 @@
+import asyncio
+
+
+class Inflight:
+    """
+    统计组件上进行中的调用数。
+    热重载替换组件后，旧实例要等这些调用全部结束才能关闭（如正在流式输出的回复还在用它的 HTTP 连接）。
+    用法：with self.inflight: ...（在事件循环上进入和退出）。
+    """
+
+    def __init__(self):
+        self.active = 0
+        self._idle = None  # 等待空闲时才创建的 asyncio.Event
+
+    def __enter__(self):
+        self.active += 1
+        return self
+
+    def __exit__(self, *exc):
+        self.active -= 1
+        if self.active == 0 and self._idle:
+            self._idle.set()
+
+    async def wait_idle(self, timeout: float = None) -> bool:
+        """等待进行中的调用全部结束，返回是否在 timeout 秒内等到"""
+        if self.active == 0:
+            return True
+        if self._idle is None or self._idle.is_set():
+            self._idle = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
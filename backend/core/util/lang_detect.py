@@ -0,0 +1,64 @@
+import functools
+import logging
+from langdetect import DetectorFactory, detect
+
+DetectorFactory.seed = 0  # 固定随机种子，同一句话每次检测结果一致
+
+# 各翻译服务的语言代码与 ISO 639-1 的对应（如百度的 jp、kor）
+LANG_ALIASES = {"jp": "ja", "kor": "ko", "fra": "fr", "spa": "es", "cht": "zh", "wyw": "zh", "yue": "zh"}
+
+
+def normalize_lang(code: str) -> str:
+    """把各家的语言代码统一成 ISO 639-1，如 jp -> ja、zh-cn -> zh"""
+    code = (code or "").lower()
+    return LANG_ALIASES.get(code, code.split("-")[0])
+
+
+def _script(ch: str) -> str | None:
+    """返回字符所属的文字类别，非文字（标点、数字、emoji 等）返回 None"""
+    cp = ord(ch)
+    if 0x3040 <= cp <= 0x30FF or 0x31F0 <= cp <= 0x31FF or 0xFF66 <= cp <= 0xFF9F:
+        return "kana"
+    if 0x4E00 <= cp <= 0x9FFF or 0x3400 <= cp <= 0x4DBF or 0xF900 <= cp <= 0xFAFF:
+        return "han"
+    if 0xAC00 <= cp <= 0xD7AF or 0x1100 <= cp <= 0x11FF or 0x3130 <= cp <= 0x318F:
+        return "hangul"
+    if ch.isascii() and ch.isalpha() or 0x00C0 <= cp <= 0x024F:
+        return "latin"
+    if ch.isalpha():
+        return "other"
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def detect_language(text: str) -> str | None:
+    """
+    按 Unicode 文字比例判断语言，只有不含中日韩文字的句子才交给统计检测器（langdetect）。
+    返回 ISO 639-1 代码；没有任何文字（纯标点、数字、emoji）时返回 None，无法判断时返回空字符串。
+    """
+    counts = {}
+    for ch in text:
+        script = _script(ch)
+        if script:
+            counts[script] = counts.get(script, 0) + 1
+    letters = sum(counts.values())
+    if not letters:
+        return None
+
+    kana, han, hangul = counts.get("kana", 0), counts.get("han", 0), counts.get("hangul", 0)
+    # 日文几乎总会夹带假名，中文不会；只有汉字的短句按中文处理
+    if kana and kana / (kana + han) >= 0.1:
+        return "ja"
+    # 含中日韩文字时按占多数的一种判断，夹杂的拉丁字母（如 "Amadeus系统启动了"）不影响结果，
+    # 否则整句交给统计检测器会被误判成葡萄牙语等拉丁语系语言
+    if hangul or han:
+        return "ko" if hangul >= han else "zh"
+    return _statistical_detect(text)
+
+
+def _statistical_detect(text: str) -> str:
+    try:
+        return normalize_lang(detect(text))
+    except Exception as e:
+        logging.debug(f"统计语言检测失败: {e}")
+        return ""
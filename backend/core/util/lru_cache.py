@@ -0,0 +1,55 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    线程安全的 LRU 缓存，同时按条目数和总字节数限制容量，并统计命中率。
+    sizeof 用于计算单个值占用的字节数，默认 len()。
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 0, sizeof=len):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes  # 0 表示不按字节数限制
+        self.sizeof = sizeof
+        self.data = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """命中时返回值并标记为最近使用，未命中返回 None"""
+        with self._lock:
+            value = self.data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            if self.max_bytes and size > self.max_bytes:
+                return
+            old = self.data.pop(key, None)
+            if old is not None:
+                self.bytes -= self.sizeof(old)
+            self.data[key] = value
+            self.bytes += size
+            while self.data and (len(self.data) > self.max_entries
+                                 or (self.max_bytes and self.bytes > self.max_bytes)):
+                _, evicted = self.data.popitem(last=False)
+                self.bytes -= self.sizeof(evicted)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.data),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -5,63 +5,160 @@ from collections import deque
 
 
 class ResourceLock:
-    """通用独占资源锁，持有者超30秒自动清理"""
+    """
+    通用独占资源锁：角色先 reserve() 排队，排到队首后 acquire() 成为持有者，release() 后交给下一位。
+    事件驱动，没有轮询任务：
+        等待方各挂一个 future，轮到自己时才被唤醒；
+        持有者用 loop.call_at 单独定时，每次 acquire（每句一次）后超过 timeout 秒没有再 acquire 或释放就强制移出，
+        避免出错的角色一直占着锁。排在队首但还没 acquire 的角色（如还在等 LLM 的第一句）不计时；
+        持有者因背压（输出队列已满，等前面的角色演出）阻塞时用 pause()/resume() 暂停计时；
+        close() 随会话一起调用，取消定时器并唤醒所有等待方。
+    stats() 导出排队等待时长、持有时长和超时强制清理次数。
+    """
 
     def __init__(self, timeout: float = 30.0):
         self.queue = deque()
-        self.condition = asyncio.Condition()
         self.holder = None
-        self.holder_since = 0
         self.timeout = timeout
-        asyncio.create_task(self._watchdog())
-
-    async def _watchdog(self):
-        """每秒检查持有者是否超时"""
-        while True:
-            await asyncio.sleep(1)
-            async with self.condition:
-                if self.holder and time.time() - self.holder_since > self.timeout:
-                    logging.warning(f"[ResourceLock] {self.holder} 超时，强制清理")
-                    self._clear_first()
-
-    def _clear_first(self):
-        """强制清理队首"""
-        if self.queue:
-            removed = self.queue.popleft()
-            self.holder = None
-            self.condition.notify_all()
-            logging.info(f"[ResourceLock] 已清理: {removed}, 剩余: {list(self.queue)}")
+        self._waiters = {}      # agent_id -> 等待排到队首的 future
+        self._enqueued_at = {}  # agent_id -> 入队时间
+        self._held_since = 0.0
+        self._timer = None
+        self._paused = 0  # 持有者当前因背压阻塞的次数，大于 0 时不计时
+        self._closed = False
+
+        self.acquired = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_hold = 0.0
+        self.max_hold = 0.0
 
     async def reserve(self, agent_id):
-        async with self.condition:
-            if agent_id not in self.queue:
-                self.queue.append(agent_id)
+        self._enqueue(agent_id)
 
     async def acquire(self, agent_id):
-        async with self.condition:
-            if agent_id not in self.queue:
-                self.queue.append(agent_id)
-            while self.queue[0] != agent_id:
-                await self.condition.wait()
+        if self._closed:
+            return
+        self._enqueue(agent_id)
+        while self.queue[0] != agent_id:
+            waiter = self._waiters.get(agent_id)
+            if waiter is None or waiter.done():
+                waiter = self._waiters[agent_id] = asyncio.get_running_loop().create_future()
+            try:
+                await waiter
+            finally:
+                if self._waiters.get(agent_id) is waiter:
+                    del self._waiters[agent_id]
+            if self._closed:
+                return
+            # 等待期间被强制移出队列（超时或中断）：重新排到队尾
+            self._enqueue(agent_id)
+
+        now = time.monotonic()
+        if self.holder != agent_id:
             self.holder = agent_id
-            self.holder_since = time.time()
+            self._held_since = now
+            wait = now - self._enqueued_at.get(agent_id, now)
+            self.acquired += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        # 持有者每次 acquire（每句一次）都重新计时
+        self._arm_timer()
 
     async def release(self, agent_id):
-        async with self.condition:
-            if self.holder == agent_id:
-                self.queue.popleft()
-                self.holder = None
-                self.condition.notify_all()
+        self._remove(agent_id)
 
     async def force_release(self, agent_id):
-        async with self.condition:
-            if agent_id == self.holder or agent_id in self.queue:
-                self.queue = deque([a for a in self.queue if a != agent_id])
-                if self.holder == agent_id:
-                    self.holder = None
-                    self.condition.notify_all()
-                return True
+        """不论是否持有，把 agent_id 移出队列，返回它原先是否在队列中"""
+        return self._remove(agent_id)
+
+    def pause(self, agent_id):
+        """持有者开始因背压等待：暂停超时计时（可嵌套，与 resume 成对调用）"""
+        if self.holder == agent_id:
+            self._paused += 1
+            self._cancel_timer()
+
+    def resume(self, agent_id):
+        """持有者结束背压等待：重新开始计时"""
+        if self.holder == agent_id and self._paused > 0:
+            self._paused -= 1
+            self._arm_timer()
+
+    def close(self):
+        """会话结束时调用：取消定时器，唤醒所有等待方，之后的 acquire 不再阻塞"""
+        self._closed = True
+        self._cancel_timer()
+        for waiter in self._waiters.values():
+            if not waiter.done():
+                waiter.set_result(None)
+        self._waiters.clear()
+        self.queue.clear()
+        self._enqueued_at.clear()
+        self.holder = None
+
+    def stats(self) -> dict:
+        return {
+            "queue": len(self.queue),
+            "holder": self.holder,
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.total_wait / self.acquired * 1000, 1) if self.acquired else 0,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "avg_hold_ms": round(self.total_hold / self.acquired * 1000, 1) if self.acquired else 0,
+            "max_hold_ms": round(self.max_hold * 1000, 1),
+        }
+
+    def _enqueue(self, agent_id):
+        if self._closed or agent_id in self.queue:
+            return
+        self.queue.append(agent_id)
+        self._enqueued_at[agent_id] = time.monotonic()
+
+    def _remove(self, agent_id) -> bool:
+        if agent_id not in self.queue:
             return False
+        was_head = self.queue[0] == agent_id
+        self.queue.remove(agent_id)
+        self._enqueued_at.pop(agent_id, None)
+        if self.holder == agent_id:
+            hold = time.monotonic() - self._held_since
+            self.total_hold += hold
+            self.max_hold = max(self.max_hold, hold)
+            self.holder = None
+            self._paused = 0
+        # 被移出的一方如果还在等待，唤醒它自行处理
+        self._wake(agent_id)
+        if was_head:
+            self._cancel_timer()
+            if self.queue:
+                self._wake(self.queue[0])
+        return True
+
+    def _wake(self, agent_id):
+        waiter = self._waiters.pop(agent_id, None)
+        if waiter and not waiter.done():
+            waiter.set_result(None)
+
+    def _arm_timer(self):
+        """为当前持有者重新计时；没有持有者或正处于背压等待时不计时"""
+        self._cancel_timer()
+        if self.holder is not None and not self._paused and self.timeout > 0:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_at(loop.time() + self.timeout, self._expire, self.holder)
+
+    def _cancel_timer(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    def _expire(self, agent_id):
+        self._timer = None
+        if self.holder == agent_id:
+            self.timeouts += 1
+            logging.warning(f"[ResourceLock] {agent_id} 超过 {self.timeout} 秒未释放，强制清理")
+            self._remove(agent_id)
+            logging.info(f"[ResourceLock] 已清理: {agent_id}, 剩余: {list(self.queue)}")
 
 
 class DummyLock:
@@ -69,3 +166,7 @@ class DummyLock:
     async def acquire(self, agent_id): pass
     async def release(self, agent_id): pass
     async def force_release(self, agent_id): return True
+    def pause(self, agent_id): pass
+    def resume(self, agent_id): pass
+    def close(self): pass
+    def stats(self): return None
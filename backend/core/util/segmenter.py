@@ -0,0 +1,109 @@
+SENTENCE_ENDS = set("。！？!?…\n")
+CLAUSE_MARKS = set("，、,；;：:")
+CLOSERS = set("」』”’\"')）】》〉")
+# 后面跟句点也不算句末的英文缩写（小写比较）；单个字母加句点（姓名缩写）同样不切
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "no", "fig", "approx"}
+
+
+class Segmenter:
+    """
+    流式断句器：把 LLM 逐 token 输出的文本切成送去 TTS 的句子。
+        feed(text)  追加文本，返回已经可以合成的句子列表
+        flush()     一轮回复结束时取出剩余内容
+        reset()     丢弃缓冲（如被打断），下一句重新按“首句”处理
+    断句策略兼顾首音延迟和合成效率：
+        首句在第一个逗号等分句处就切出（至少 first_min_chars 个字），尽早开口；
+        之后按句末标点切，短于 min_chars 的句子与下一句合并，减少零碎的合成调用；
+        缓冲区达到 max_chars 仍切不出时，依次退回到最后一个句末（即使不足 min_chars）、
+        最后一个分句处、最后一个空白处，都没有才在 max_chars 处硬切。
+    中英文标点都按句末/分句处理，句末标点后紧跟的引号、括号归入前一句；
+    英文句点只有后面跟空白时才算句末，避免切开 3.14 之类的写法，Mr.、e.g. 等缩写和姓名缩写后的句点也不算。
+    """
+
+    def __init__(self, first_min_chars: int = 4, min_chars: int = 10, max_chars: int = 80):
+        self.first_min_chars = first_min_chars
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.buffer = ""
+        self.first = True
+
+    def feed(self, text: str) -> list:
+        self.buffer += text
+        sentences = []
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                break
+            self._emit(self.buffer[:cut], sentences)
+            self.buffer = self.buffer[cut:]
+        return sentences
+
+    def flush(self) -> list:
+        sentences = []
+        self._emit(self.buffer, sentences)
+        self.reset()
+        return sentences
+
+    def reset(self):
+        self.buffer = ""
+        self.first = True
+
+    def _emit(self, chunk: str, sentences: list):
+        chunk = chunk.strip()
+        if chunk:
+            sentences.append(chunk)
+            self.first = False
+
+    @staticmethod
+    def _length(text: str) -> int:
+        """只统计文字和数字，标点、空白、emoji 不算长度"""
+        return sum(1 for ch in text if ch.isalnum())
+
+    @staticmethod
+    def _is_abbreviation(buf: str, dot: int) -> bool:
+        """buf[dot] 处的句点是否属于缩写（Mr.、e.g.）或姓名缩写（J.）"""
+        start = dot
+        while start > 0 and (buf[start - 1].isalpha() or buf[start - 1] == "."):
+            start -= 1
+        word = buf[start:dot].lower()
+        return word in ABBREVIATIONS or (len(word) == 1 and word.isascii() and word.isalpha())
+
+    def _find_cut(self) -> int | None:
+        """返回缓冲区中可以切分的位置，暂时不能切时返回 None"""
+        buf = self.buffer
+        n = len(buf)
+        min_chars = self.first_min_chars if self.first else self.min_chars
+        last_end = None     # 因为太短没有切的句末
+        last_clause = None
+
+        for i, ch in enumerate(buf):
+            if i >= self.max_chars:
+                break  # 超出长度上限的部分不再找切分点，交给下面的长句处理
+            if ch == "." and (i + 1 < n and not buf[i + 1].isspace() or self._is_abbreviation(buf, i)):
+                continue  # 小数点、缩写
+            if ch in SENTENCE_ENDS or ch == ".":
+                # 连续的句末标点和收尾引号一起切；到缓冲区末尾时还不知道后面是否还有，等下一段
+                end = i + 1
+                while end < n and (buf[end] in SENTENCE_ENDS or buf[end] in CLOSERS or buf[end] == "."):
+                    end += 1
+                if end == n:
+                    return None
+                if self._length(buf[:end]) >= min_chars:
+                    return end
+                last_end = end
+            elif ch in CLAUSE_MARKS:
+                last_clause = i + 1
+                if self.first and self._length(buf[:i + 1]) >= min_chars:
+                    return i + 1
+
+        if n < self.max_chars:
+            return None
+        # 长句：句末 -> 分句 -> 空白 -> 硬切
+        if last_end:
+            return last_end
+        if last_clause and self._length(buf[:last_clause]) >= self.min_chars:
+            return last_clause
+        space = buf.rfind(" ", 0, self.max_chars)
+        if space > 0 and self._length(buf[:space]):
+            return space + 1
+        return self.max_chars
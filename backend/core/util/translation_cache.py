@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import os
+import unicodedata
+from core.util.lru_cache import LRUCache
+from core.util.storage import get_database_connection
+
+
+class TranslationCache:
+    """
+    翻译结果缓存，键为 (provider, from_lang, to_lang, 归一化文本)。
+    两级存储：内存 LRU + 可选的 sqlite 持久化（重启后仍可命中）。
+    """
+
+    def __init__(self, max_entries: int = 2048, db_path: str = ""):
+        self.memory = LRUCache(max_entries=max_entries)
+        self.db_path = db_path
+        self.db_hits = 0
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._init_database()
+
+    def _init_database(self):
+        conn = get_database_connection(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                provider TEXT NOT NULL,
+                from_lang TEXT NOT NULL,
+                to_lang TEXT NOT NULL,
+                text TEXT NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (provider, from_lang, to_lang, text)
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_key(provider: str, from_lang, to_lang, text: str) -> tuple:
+        normalized = " ".join(unicodedata.normalize("NFKC", text).split())
+        return provider, from_lang or "", to_lang or "", normalized
+
+    def _read_db(self, key: tuple) -> str | None:
+        try:
+            conn = get_database_connection(self.db_path)
+            row = conn.execute(
+                "SELECT result FROM translations WHERE provider=? AND from_lang=? AND to_lang=? AND text=?",
+                key).fetchone()
+            conn.close()
+            return row[0] if row else None
+        except Exception as e:
+            logging.warning(f"翻译缓存读取失败: {e}")
+            return None
+
+    def _write_db(self, key: tuple, result: str):
+        try:
+            conn = get_database_connection(self.db_path)
+            conn.execute("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)", (*key, result))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logging.warning(f"翻译缓存写入失败: {e}")
+
+    async def get(self, key: tuple) -> str | None:
+        """依次查内存和 sqlite，命中返回译文"""
+        result = self.memory.get(key)
+        if result is None and self.db_path:
+            result = await asyncio.to_thread(self._read_db, key)
+            if result is not None:
+                self.db_hits += 1
+                self.memory.put(key, result)
+        return result
+
+    async def put(self, key: tuple, result: str):
+        self.memory.put(key, result)
+        if self.db_path:
+            await asyncio.to_thread(self._write_db, key, result)
+
+    def stats(self) -> dict:
+        stats = self.memory.stats()
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "hit_rate": round((stats["hits"] + self.db_hits) / lookups, 4) if lookups else 0.0,
+            "db_hits": self.db_hits,
+        })
+        return stats
@@ -0,0 +1,135 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TTSBusyError(RuntimeError):
+    """TTS 排队已满，新任务被拒绝"""
+
+
+class TTSScheduler:
+    """
+    进程级 TTS 调度器。
+    所有会话的合成任务都经过这里：每个会话一条等待队列，按会话轮询（round-robin）取任务，
+    保证一个用户的长回复不会饿死其他用户；同时运行的合成数不超过 max_concurrency，
+    队列深度超过上限时直接拒绝（TTSBusyError），由调用方降级为纯文本输出。
+    会话内按播放截止顺序（priority，越小越先播放）取任务，而不是按提交顺序，
+    所以排在后面演出的角色也能提前合成，但不会抢在先播放的句子前面。
+    同一模型同时进行的合成数不超过 max_per_model，使用不同模型的角色可以在多个 worker 上并行。
+    """
+
+    def __init__(self, max_concurrency: int = 1, max_per_model: int = 0,
+                 max_pending_per_session: int = 8, max_pending: int = 64):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_per_model = max_per_model  # 0 表示只受 max_concurrency 限制
+        self.max_pending_per_session = max_pending_per_session
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="tts")
+
+        # session_id -> [(priority, 序号, model, func, future)]，字典顺序即轮询顺序
+        self.queues = OrderedDict()
+        self.running_by_model = {}
+        self._seq = 0
+        self.pending = 0
+        self.running = 0
+        self.rejected = 0
+        self.completed = 0
+
+    async def run(self, session_id: str, func, priority=None, model=None):
+        """排队执行一个同步合成函数，返回其结果，参数见 submit()"""
+        return await self.submit(session_id, func, priority=priority, model=model)
+
+    def submit(self, session_id: str, func, priority=None, model=None) -> asyncio.Future:
+        """
+        排队一个同步合成函数，返回结果的 future；取消 future 即撤回尚未开始的任务。
+        priority 为播放截止顺序（可比较的值，如 (演出序号, 句序号)），未指定时排在最后；
+        model 标识合成所用的模型，用于按模型限制并发。
+        队列已满时立即抛出 TTSBusyError（同步抛出，调用方可在共享合成结果之前处理）。
+        """
+        # 先清掉已取消的任务（如刚被打断的会话），它们不应再占用配额
+        self._prune()
+        queue = self.queues.get(session_id)
+        if self.pending >= self.max_pending or (queue and len(queue) >= self.max_pending_per_session):
+            self.rejected += 1
+            raise TTSBusyError(f"TTS 队列已满 (会话 {session_id})")
+
+        future = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        key = (0, priority) if priority is not None else (1,)
+        self.queues.setdefault(session_id, []).append((key, self._seq, model, func, future))
+        self.pending += 1
+        self._pump()
+        return future
+
+    def _pump(self):
+        """在并发上限内按会话轮询启动任务"""
+        loop = asyncio.get_running_loop()
+        while self.running < self.max_concurrency:
+            job = self._pick()
+            if job is None:
+                break
+            _, _, model, func, future = job
+            self.running += 1
+            self.running_by_model[model] = self.running_by_model.get(model, 0) + 1
+            task = loop.run_in_executor(self.executor, func)
+            task.add_done_callback(lambda t, f=future, m=model: self._on_done(f, m, t))
+
+    def _prune(self):
+        """丢弃等待方已取消（如用户打断）的任务，并清理空队列"""
+        for session_id, queue in list(self.queues.items()):
+            alive = [job for job in queue if not job[4].cancelled()]
+            self.pending -= len(queue) - len(alive)
+            if alive:
+                queue[:] = alive
+            else:
+                del self.queues[session_id]
+
+    def _pick(self):
+        """按会话轮询，取出该会话中模型尚有空闲、播放截止最早的任务；都不能启动时返回 None"""
+        self._prune()
+        for session_id, queue in self.queues.items():
+            ready = [job for job in queue if self._model_available(job[2])]
+            if not ready:
+                continue
+            job = min(ready, key=lambda j: (j[0], j[1]))
+            queue.remove(job)
+            self.pending -= 1
+            if queue:
+                self.queues.move_to_end(session_id)
+            else:
+                del self.queues[session_id]
+            return job
+        return None
+
+    def _model_available(self, model) -> bool:
+        return self.max_per_model <= 0 or self.running_by_model.get(model, 0) < self.max_per_model
+
+    def _on_done(self, future, model, task):
+        self.running -= 1
+        self.running_by_model[model] -= 1
+        if not self.running_by_model[model]:
+            del self.running_by_model[model]
+        self.completed += 1
+        if not future.cancelled():
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+        self._pump()
+
+    def close(self):
+        """关闭线程池，不等待也不取消（热重载时旧实例已没有进行中的合成）"""
+        self.executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        """调度器运行指标"""
+        return {
+            "running": self.running,
+            "running_by_model": dict(self.running_by_model),
+            "pending": self.pending,
+            "sessions_waiting": len(self.queues),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
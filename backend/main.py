@@ -1,10 +1,13 @@
 from fastapi import FastAPI, WebSocket, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from contextlib import asynccontextmanager
 from core.handler.ws_handler import WSHandler
 from core.component.Components import Components
 from core.auth.login import AuthManager
 import uvicorn
+import asyncio
 import logging
 import colorlog
 import sys
@@ -25,7 +28,29 @@ handler.setFormatter(colorlog.ColoredFormatter(
 ))
 logging.basicConfig(level=logging.INFO, handlers=[handler])
 
-app = FastAPI()
+# 进程级共享的组件（LLM、翻译、TTS 模型），在应用启动时创建一次
+components: Components = None
+# 认证管理器（所有连接共用，token 签名密钥与有效期见配置文件 auth 段），随组件一起创建
+auth_manager: AuthManager = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global components, auth_manager
+    components = Components()
+    auth_manager = AuthManager.from_config(components.config.get("auth"))
+    logging.info("共享组件已初始化")
+    # 后台预热 LLM、翻译和 TTS，完成前 /api/ready 返回 503
+    warmup_task = asyncio.create_task(components.warmup())
+    # 后台监视配置文件，修改后无需重启即可生效
+    watch_task = asyncio.create_task(components.config_service.watch())
+    yield
+    warmup_task.cancel()
+    watch_task.cancel()
+    await components.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # 添加 CORS 中间件，允许前端跨域请求
 app.add_middleware(
@@ -36,9 +61,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 实例化认证管理器
-auth_manager = AuthManager()
-
 # 请求体模型
 class LoginRequest(BaseModel):
     username: str
@@ -70,7 +92,7 @@ async def verify_token(request: VerifyRequest):
     """
     验证 token 有效性接口
     """
-    user_info = auth_manager.verify_token(request.token)
+    user_info = await auth_manager.averify_token(request.token)
     if user_info:
         return {
             "valid": True,
@@ -79,13 +101,32 @@ async def verify_token(request: VerifyRequest):
     else:
         raise HTTPException(status_code=401, detail="Token 无效")
 
+@app.get("/api/ready")
+async def ready():
+    """
+    就绪检查接口，返回各组件预热状态与耗时；预热完成前返回 503，供负载均衡判断是否导流
+    """
+    if not components.readiness["ready"]:
+        return JSONResponse(status_code=503, content=components.readiness)
+    return components.readiness
+
+@app.get("/api/metrics")
+async def metrics():
+    """
+    运行指标接口（会话数、TTS 调度队列等）
+    """
+    return components.metrics()
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    # 为每个连接创建一个独立的 Components 实例，确保用户隔离
-    components = Components()
+    # 每个连接只创建轻量的会话视图（ASR 流、TTS 锁），重量级组件全进程共享
+    session = components.create_session()
     # 为每个连接创建一个独立的 WSHandler 实例，存储连接相关的状态（如角色实例）
-    handler = WSHandler()
-    await handler.handle_ws(websocket, components)
+    handler = WSHandler(auth_manager)
+    try:
+        await handler.handle_ws(websocket, session)
+    finally:
+        session.close()
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -0,0 +1,133 @@
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加项目根路径
+sys.path.append(str(Path(__file__).parent.parent))
+from core.util.audio import AudioEncoder, Resampler, mulaw_encode, pcm_to_wav, resample, wav_to_pcm
+
+
+def _linear2ulaw(sample: int) -> int:
+    """G.711 参考实现（逐个采样查段表），用来核对向量化的 mulaw_encode"""
+    BIAS, CLIP = 0x84, 32635
+    sign = 0x80 if sample < 0 else 0
+    magnitude = min(abs(sample), CLIP) + BIAS
+    segment = 0
+    for segment, limit in enumerate((0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF, 0x3FFF, 0x7FFF)):
+        if magnitude <= limit:
+            break
+    mantissa = (magnitude >> (segment + 3)) & 0x0F
+    return ~(sign | (segment << 4) | mantissa) & 0xFF
+
+
+def _pcm(samples) -> bytes:
+    return np.asarray(samples, dtype="<i2").tobytes()
+
+
+def _tone(n: int, rate: int = 32000) -> np.ndarray:
+    t = np.arange(n) / rate
+    return (np.sin(2 * np.pi * 440 * t) * 12000).astype(np.int16)
+
+
+def _mulaw_data(data: bytes) -> bytes:
+    """取出 μ-law WAV 的 data 块（wave 模块不能读格式码 7）"""
+    index = data.index(b"data")
+    size = struct.unpack("<I", data[index + 4:index + 8])[0]
+    return data[index + 8:index + 8 + size]
+
+
+def test_mulaw_known_values():
+    samples = np.array([0, -1, 32767, -32768, 1000, -1000], dtype=np.int16)
+    assert mulaw_encode(samples).tolist() == [0xFF, 0x7F, 0x80, 0x00, 0xCE, 0x4E]
+
+
+def test_mulaw_matches_reference_for_all_samples():
+    samples = np.arange(-32768, 32768, dtype=np.int32).astype(np.int16)
+    expected = [_linear2ulaw(int(s)) for s in samples]
+    assert mulaw_encode(samples).tolist() == expected
+
+
+def test_mulaw_wav_header():
+    data = AudioEncoder("mulaw").encode(_pcm([0, 1000, -1000]), 16000)
+    assert data[:4] == b"RIFF" and data[8:12] == b"WAVE"
+    assert struct.unpack("<I", data[4:8])[0] == len(data) - 8
+    fmt_code, channels, rate, byte_rate, align, bits = struct.unpack("<HHIIHH", data[20:36])
+    assert (fmt_code, channels, rate, byte_rate, align, bits) == (7, 1, 16000, 16000, 1, 8)
+    assert data.endswith(b"\xff\xce\x4e\x00")  # 奇数长度的 data 块补一个字节
+
+
+def test_pcm8_values():
+    data = AudioEncoder("pcm8").encode(_pcm([0, 32767, -32768, 256, -256, 255]), 16000)
+    pcm, rate, channels, width = wav_to_pcm(data)
+    assert (rate, channels, width) == (16000, 1, 1)
+    assert list(pcm) == [128, 255, 0, 129, 127, 128]
+
+
+def test_pcm16_passthrough():
+    pcm = _pcm([1, -2, 3])
+    assert AudioEncoder().encode(pcm, 32000) == pcm_to_wav(pcm, 32000)
+
+
+def test_downmix_stereo():
+    data = AudioEncoder().encode(_pcm([100, 300, -100, -300]), 16000, channels=2)
+    pcm, rate, channels, _ = wav_to_pcm(data)
+    assert channels == 1
+    assert np.frombuffer(pcm, dtype="<i2").tolist() == [200, -200]
+
+
+@pytest.mark.parametrize("src_rate, dst_rate, n", [
+    (32000, 16000, 32000),
+    (32000, 16000, 32001),
+    (32000, 24000, 9600),
+    (44100, 16000, 44100),
+    (48000, 8000, 4801),
+])
+def test_resample_length(src_rate, dst_rate, n):
+    out = resample(np.zeros(n, dtype=np.int16), src_rate, dst_rate)
+    assert len(out) == int(np.floor((n - 1) * dst_rate / src_rate)) + 1
+
+
+def test_no_upsampling():
+    samples = _tone(100)
+    assert AudioEncoder(sample_rate=48000).target_rate(32000) == 32000
+    assert len(resample(samples, 16000, 32000)) == len(samples)
+
+
+def test_encoder_reports_target_rate():
+    data = AudioEncoder("pcm16", sample_rate=16000).encode(_pcm(_tone(3200)), 32000)
+    pcm, rate, _, _ = wav_to_pcm(data)
+    assert rate == 16000
+    assert len(pcm) // 2 == 1600
+
+
+@pytest.mark.parametrize("src_rate, dst_rate", [(32000, 16000), (32000, 24000), (44100, 16000)])
+def test_chunked_resampling_matches_whole(src_rate, dst_rate):
+    samples = _tone(10007, src_rate)
+    whole = Resampler(src_rate, dst_rate).process(samples)
+
+    resampler = Resampler(src_rate, dst_rate)
+    pieces, start = [], 0
+    for size in (1, 2, 17, 500, 1, 3000, 4096):
+        pieces.append(resampler.process(samples[start:start + size]))
+        start += size
+    pieces.append(resampler.process(samples[start:]))
+    np.testing.assert_allclose(np.concatenate(pieces), whole, atol=1e-3)
+
+
+def test_encoder_stream_matches_whole_sentence():
+    samples = _tone(8000)
+    encoder = AudioEncoder("mulaw", sample_rate=16000)
+    whole = _mulaw_data(encoder.encode(_pcm(samples), 32000))
+
+    stream = encoder.stream()
+    pieces = b"".join(_mulaw_data(stream.encode(_pcm(samples[i:i + 1234]), 32000))
+                      for i in range(0, len(samples), 1234))
+    assert pieces == whole
+
+
+def test_unknown_format_rejected():
+    with pytest.raises(ValueError):
+        AudioEncoder("opus")
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# 添加项目根路径
+sys.path.append(str(Path(__file__).parent.parent))
+from core.auth.login import AuthManager
+from core.util.storage import get_database_connection
+
+
+@pytest.fixture
+def make_auth(tmp_path):
+    def make(**kwargs):
+        kwargs.setdefault("db_name", str(tmp_path / "users.db"))
+        kwargs.setdefault("secret_file", str(tmp_path / "auth_secret"))
+        return AuthManager(**kwargs)
+    return make
+
+
+def _delete_user(auth, username):
+    conn = get_database_connection(auth.db_name)
+    conn.execute("DELETE FROM users WHERE username = ?", (username,))
+    conn.commit()
+    conn.close()
+
+
+def test_token_round_trip(make_auth):
+    auth = make_auth(secret="s3cret")
+    assert auth.register_user("alice", "pw")
+    info = auth.verify_token(auth.pack_token("alice"))
+    assert info["username"] == "alice"
+
+
+def test_expired_token_rejected(make_auth):
+    auth = make_auth(secret="s3cret", token_ttl=-1)
+    auth.register_user("alice", "pw")
+    assert auth.verify_token(auth.pack_token("alice")) is None
+
+
+def test_tampered_payload_rejected(make_auth):
+    auth = make_auth(secret="s3cret")
+    auth.register_user("alice", "pw")
+    auth.register_user("mallory", "pw")
+    payload, signature = auth.pack_token("mallory").split(".")
+    info = json.loads(auth._b64decode(payload))
+    info["username"] = "alice"
+    forged = auth._b64encode(json.dumps(info).encode())
+    assert auth.verify_token(f"{forged}.{signature}") is None
+
+
+def test_tampered_signature_rejected(make_auth):
+    auth = make_auth(secret="s3cret")
+    auth.register_user("alice", "pw")
+    payload, signature = auth.pack_token("alice").split(".")
+    flipped = ("A" if signature[0] != "A" else "B") + signature[1:]
+    assert auth.verify_token(f"{payload}.{flipped}") is None
+    assert auth.verify_token(payload) is None
+    assert auth.verify_token("") is None
+
+
+def test_token_from_other_secret_rejected(make_auth):
+    token = make_auth(secret="one").pack_token("alice")
+    auth = make_auth(secret="two")
+    auth.register_user("alice", "pw")
+    assert auth.verify_token(token) is None
+
+
+def test_secret_file_persists_across_instances(make_auth, tmp_path):
+    first = make_auth()
+    first.register_user("alice", "pw")
+    assert (tmp_path / "auth_secret").exists()
+    assert make_auth().verify_token(first.pack_token("alice"))["username"] == "alice"
+
+
+def test_deleted_user_rejected_after_check_ttl(make_auth):
+    auth = make_auth(secret="s3cret", user_check_ttl=0.05)
+    auth.register_user("alice", "pw")
+    token = auth.pack_token("alice")
+    assert auth.verify_token(token)
+    _delete_user(auth, "alice")
+    # 缓存期内仍然有效，缓存过期后失效
+    assert auth.verify_token(token)
+    time.sleep(0.1)
+    assert auth.verify_token(token) is None
+
+
+def test_user_check_disabled_trusts_signature(make_auth):
+    auth = make_auth(secret="s3cret", user_check_ttl=0)
+    assert auth.verify_token(auth.pack_token("ghost"))["username"] == "ghost"
+
+
+def test_averify_token(make_auth):
+    auth = make_auth(secret="s3cret")
+    auth.register_user("alice", "pw")
+    token = auth.pack_token("alice")
+
+    async def scenario():
+        assert (await auth.averify_token(token))["username"] == "alice"
+        assert await auth.averify_token(token + "x") is None
+        assert await auth.averify_token(auth.pack_token("bob")) is None
+
+    asyncio.run(scenario())
+
+
+def test_verify_user_password(make_auth):
+    auth = make_auth(secret="s3cret")
+    auth.register_user("alice", "pw")
+    assert auth.verify_user("alice", "pw")
+    assert not auth.verify_user("alice", "wrong")
+    assert not auth.register_user("alice", "again")
+
+
+def test_from_config_ignores_unknown_keys(tmp_path, caplog):
+    config = {
+        "db_name": str(tmp_path / "users.db"),
+        "secret": "s3cret",
+        "token_ttl": 10,
+        "tokne_ttl": 99,
+    }
+    with caplog.at_level(logging.WARNING):
+        auth = AuthManager.from_config(config)
+    assert auth.token_ttl == 10
+    assert "tokne_ttl" in caplog.text
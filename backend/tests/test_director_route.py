@@ -0,0 +1,73 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加项目根路径
+sys.path.append(str(Path(__file__).parent.parent))
+from core.Director import Director
+from core.util.lru_cache import LRUCache
+
+
+class StubLLM:
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    async def generate(self, prompt, **kwargs):
+        self.calls += 1
+        yield self.reply
+
+
+class StubComponents:
+    def __init__(self, reply='{"characters": ["kurisu"]}'):
+        self.config = {
+            "characters": [
+                {"name": "maho", "aliases": ["真帆", "Maho"]},
+                {"name": "kurisu", "aliases": ["紅莉栖", "Kurisu", "Chris"]},
+            ],
+        }
+        self.llm = StubLLM(reply)
+        self.router_llm = None
+        self.route_cache = LRUCache()
+        self.route_stats = {"single": 0, "mention": 0, "cache": 0, "llm": 0, "fallback": 0,
+                            "speculation_hit": 0, "speculation_miss": 0}
+
+
+NAMES = ["maho", "kurisu"]
+
+
+def test_mentions_in_order_of_appearance():
+    director = Director(StubComponents())
+    assert director.quick_route("紅莉栖和真帆怎么看？", NAMES) == ["kurisu", "maho"]
+    assert director.quick_route("Maho, what do you think?", NAMES) == ["maho"]
+
+
+def test_latin_alias_needs_word_boundary():
+    director = Director(StubComponents())
+    # "chris" 出现在 "christmas" 内部，不算点名
+    assert director.quick_route("merry christmas everyone", NAMES) is None
+    assert director.quick_route("Chris, merry christmas", NAMES) == ["kurisu"]
+    # 中日文别名没有词边界，按子串匹配
+    assert director.quick_route("真帆酱早上好", NAMES) == ["maho"]
+
+
+def test_slow_route_asks_llm_once_then_caches():
+    components = StubComponents()
+    director = Director(components)
+    text = "今天天气怎么样"
+
+    assert director.quick_route(text, NAMES) is None
+    assert asyncio.run(director.slow_route(text, NAMES)) == ["kurisu"]
+    assert components.llm.calls == 1
+    assert components.route_stats["llm"] == 1
+    assert components.route_stats["cache"] == 0
+
+    assert director.quick_route(text, NAMES) == ["kurisu"]
+    assert components.route_stats["cache"] == 1
+
+
+def test_slow_route_falls_back_to_first_character():
+    components = StubComponents(reply="not json")
+    director = Director(components)
+    assert asyncio.run(director.slow_route("随便聊聊", NAMES)) == ["maho"]
+    assert components.route_stats["fallback"] == 1
@@ -0,0 +1,147 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加项目根路径
+sys.path.append(str(Path(__file__).parent.parent))
+from core.Character import Character
+from core.Director import Director
+from core.util.lru_cache import LRUCache
+from core.util.resource_lock import DummyLock
+
+
+class StubLLM:
+    """每次回复输出很多句，足以填满有界的输出队列"""
+    async def generate(self, messages, **kwargs):
+        for _ in range(200):
+            await asyncio.sleep(0)
+            yield "字。"
+
+
+class StubTranslator:
+    async def atranslate(self, text):
+        return text
+
+
+class StubTTS:
+    async def stream(self, text, session_id, priority=None, **kwargs):
+        yield b"\x00" * 2048, 16000
+
+
+class StubEncoder:
+    def encode(self, pcm, sample_rate):
+        return pcm
+
+
+class StubComponents:
+    def __init__(self):
+        self.config = {
+            "characters": [{"name": "a"}, {"name": "b"}],
+            "queues": {"output_items": 16},
+            "segmenter": {"min_chars": 1},
+            "text_coalesce": {"window_ms": 0},
+        }
+        self.llm = StubLLM()
+        self.router_llm = None
+        self.translator = StubTranslator()
+        self.tts = StubTTS()
+        self.audio_encoder = StubEncoder()
+        self.tts_lock = DummyLock()
+        self.session_id = "test"
+        self.route_cache = LRUCache()
+        self.route_stats = {}
+
+
+class RecordingConnection:
+    """记录发出的项；unblocked 未置位时发送挂起，模拟客户端暂停接收"""
+    def __init__(self):
+        self.sent = []
+        self.unblocked = asyncio.Event()
+        self.unblocked.set()
+
+    async def send(self, item):
+        await self.unblocked.wait()
+        self.sent.append((item["type"], item.get("character")))
+
+
+async def _wait_for(predicate, timeout=5):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "等待超时"
+        await asyncio.sleep(0.01)
+
+
+async def _start_turn(director, characters, name, text="你好"):
+    character = characters[name]
+    await character.start_chat(text, rank=director.next_rank())
+    await director.commit(text, [name], characters)
+    return character
+
+
+def _run_interrupt_then_next_turn(next_name):
+    async def scenario():
+        components = StubComponents()
+        director = Director(components)
+        characters = {name: Character(name, {}, components) for name in ("a", "b")}
+        connection = RecordingConnection()
+        orchestrator = asyncio.create_task(director.run_orchestrator(connection, characters))
+        try:
+            # 发送端暂停，a 的输出队列被填满，a 的整条流水线因背压停住
+            connection.unblocked.clear()
+            a = await _start_turn(director, characters, "a")
+            await _wait_for(lambda: a.output_queue.full())
+
+            # 用户打断：所有角色中断并移出台词队列
+            for name, character in characters.items():
+                await character.interrupt()
+                await director.remove_from_queue(name)
+            connection.unblocked.set()
+            await asyncio.sleep(0.05)  # 打断时已在发送中的那一帧照常发完
+
+            # 下一轮必须完整演出到 end，不能卡在被打断的那句台词上
+            connection.sent.clear()
+            await _start_turn(director, characters, next_name)
+            await _wait_for(lambda: (("end", next_name) in connection.sent))
+            assert connection.sent[0] == ("start", next_name)
+            assert all(character == next_name for _, character in connection.sent)
+        finally:
+            orchestrator.cancel()
+            for character in characters.values():
+                await character.stop_tasks()
+
+    asyncio.run(scenario())
+
+
+def test_interrupt_with_full_output_queue_then_other_character():
+    _run_interrupt_then_next_turn("b")
+
+
+def test_interrupt_with_full_output_queue_then_same_character():
+    _run_interrupt_then_next_turn("a")
+
+
+def test_new_turn_supersedes_running_reply():
+    async def scenario():
+        components = StubComponents()
+        director = Director(components)
+        characters = {name: Character(name, {}, components) for name in ("a", "b")}
+        connection = RecordingConnection()
+        orchestrator = asyncio.create_task(director.run_orchestrator(connection, characters))
+        try:
+            connection.unblocked.clear()
+            a = await _start_turn(director, characters, "a")
+            await _wait_for(lambda: a.output_queue.full())
+
+            # 不打断直接开始新一轮：上一轮被中断，新一轮完整演出
+            connection.unblocked.set()
+            await _start_turn(director, characters, "a", "再说一次")
+            await _wait_for(lambda: director.script.line_queue.empty() and ("end", "a") in connection.sent)
+            assert connection.sent.count(("end", "a")) == 1
+            assert a.history[-1]["role"] == "assistant"
+        finally:
+            orchestrator.cancel()
+            for character in characters.values():
+                await character.stop_tasks()
+
+    asyncio.run(scenario())
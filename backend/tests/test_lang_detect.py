@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+# 添加项目根路径
+sys.path.append(str(Path(__file__).parent.parent))
+from core.util.lang_detect import detect_language, normalize_lang
+
+
+def test_scripts_decide_without_statistical_detector():
+    assert detect_language("你好，今天天气不错。") == "zh"
+    assert detect_language("こんにちは、元気ですか。") == "ja"
+    assert detect_language("안녕하세요") == "ko"
+
+
+def test_kanji_with_kana_is_japanese():
+    assert detect_language("今日は晴れです") == "ja"
+    assert detect_language("Amadeusのシステム") == "ja"
+
+
+def test_han_mixed_with_latin_is_chinese():
+    # 汉字占比不到一半，但仍是唯一的中日韩文字，不能交给统计检测器（会判成葡萄牙语）
+    assert detect_language("Amadeus系统启动了") == "zh"
+    assert detect_language("我用Python写了一个WebSocket server") == "zh"
+
+
+def test_hangul_mixed_with_latin_is_korean():
+    assert detect_language("안녕 hello world") == "ko"
+
+
+def test_latin_text_uses_statistical_detector():
+    assert detect_language("Hello there, how are you doing today?") == "en"
+
+
+def test_no_letters():
+    assert detect_language("!!! 123 ……") is None
+
+
+def test_normalize_lang():
+    assert normalize_lang("jp") == "ja"
+    assert normalize_lang("zh-CN") == "zh"
+    assert normalize_lang("kor") == "ko"
@@ -0,0 +1,74 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根路径
+sys.path.append(str(Path(__file__).parent.parent))
+from core.handler.protocol import (FRAME_AUDIO_IN, FRAME_AUDIO_OUT, HEADER, decode_frame, encode_frame)
+
+
+def test_round_trip():
+    payload = bytes(range(256))
+    frame = encode_frame(FRAME_AUDIO_OUT, payload, character="牧濑红莉栖", seq=7, is_final=True)
+    frame_type, is_final, seq, character, data = decode_frame(frame)
+    assert frame_type == FRAME_AUDIO_OUT
+    assert is_final is True
+    assert seq == 7
+    assert character == "牧濑红莉栖"
+    assert bytes(data) == payload
+
+
+def test_round_trip_without_character():
+    frame = encode_frame(FRAME_AUDIO_IN, b"\x01\x02")
+    assert decode_frame(frame) == (FRAME_AUDIO_IN, False, 0, "", memoryview(b"\x01\x02"))
+
+
+def test_header_layout_is_big_endian():
+    frame = encode_frame(FRAME_AUDIO_OUT, b"", character="a", seq=0x01020304, is_final=True)
+    assert frame == b"\x01\x01\x01\x02\x03\x04\x01a"
+
+
+def test_seq_wraps_to_32_bits():
+    frame = encode_frame(FRAME_AUDIO_OUT, b"", seq=2 ** 32 + 5)
+    assert decode_frame(frame)[2] == 5
+
+
+def test_empty_payload():
+    frame = encode_frame(FRAME_AUDIO_OUT, b"", character="a", is_final=True)
+    assert bytes(decode_frame(frame)[4]) == b""
+
+
+def test_payload_is_not_copied():
+    frame = encode_frame(FRAME_AUDIO_OUT, b"abc", character="a")
+    data = decode_frame(frame)[4]
+    assert isinstance(data, memoryview)
+    assert data.obj is frame
+
+
+@pytest.mark.parametrize("frame", [
+    b"",
+    b"\x01\x00\x00\x00",
+    HEADER.pack(FRAME_AUDIO_OUT, 0, 0, 0)[:-1],
+])
+def test_short_frame_rejected(frame):
+    with pytest.raises(ValueError):
+        decode_frame(frame)
+
+
+def test_unknown_frame_type_rejected():
+    frame = HEADER.pack(9, 0, 0, 0) + b"abc"
+    with pytest.raises(ValueError):
+        decode_frame(frame)
+
+
+def test_name_length_beyond_frame_rejected():
+    frame = HEADER.pack(FRAME_AUDIO_OUT, 0, 0, 10) + b"abc"
+    with pytest.raises(ValueError):
+        decode_frame(frame)
+
+
+def test_invalid_utf8_name_rejected():
+    frame = HEADER.pack(FRAME_AUDIO_OUT, 0, 0, 2) + b"\xff\xfe" + b"abc"
+    with pytest.raises(ValueError):
+        decode_frame(frame)
@@ -0,0 +1,123 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加项目根路径
+sys.path.append(str(Path(__file__).parent.parent))
+from core.util.resource_lock import ResourceLock
+
+
+def test_holders_follow_reservation_order():
+    async def scenario():
+        lock = ResourceLock(timeout=0)
+        order = []
+
+        async def speak(name):
+            await lock.acquire(name)
+            order.append(name)
+            await asyncio.sleep(0.01)
+            await lock.release(name)
+
+        for name in ("a", "b", "c"):
+            await lock.reserve(name)
+        # 后预约的先来 acquire 也要等前面的角色释放
+        await asyncio.gather(speak("c"), speak("b"), speak("a"))
+        assert order == ["a", "b", "c"]
+        assert lock.stats()["acquired"] == 3
+        assert not lock.queue and lock.holder is None
+
+    asyncio.run(scenario())
+
+
+def test_reacquire_by_holder_does_not_block():
+    async def scenario():
+        lock = ResourceLock(timeout=0)
+        await lock.acquire("a")
+        await asyncio.wait_for(lock.acquire("a"), 0.1)
+        assert lock.holder == "a"
+        assert lock.stats()["acquired"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_holder_times_out_and_next_proceeds():
+    async def scenario():
+        lock = ResourceLock(timeout=0.05)
+        await lock.acquire("a")
+        await lock.reserve("b")
+        await asyncio.wait_for(lock.acquire("b"), 1)
+        assert lock.holder == "b"
+        assert lock.timeouts == 1
+        assert "a" not in lock.queue
+
+    asyncio.run(scenario())
+
+
+def test_head_that_has_not_acquired_is_not_timed():
+    async def scenario():
+        # 排在队首但还没 acquire（如 LLM 还没产出第一句）不会被超时清理
+        lock = ResourceLock(timeout=0.05)
+        await lock.reserve("a")
+        await lock.reserve("b")
+        await asyncio.sleep(0.15)
+        assert list(lock.queue) == ["a", "b"]
+        assert lock.timeouts == 0
+
+    asyncio.run(scenario())
+
+
+def test_pause_stops_timer_and_resume_restarts_it():
+    async def scenario():
+        lock = ResourceLock(timeout=0.05)
+        await lock.acquire("a")
+        lock.pause("a")
+        await asyncio.sleep(0.15)
+        assert lock.holder == "a" and lock.timeouts == 0
+
+        lock.resume("a")
+        await asyncio.sleep(0.15)
+        assert lock.holder is None and lock.timeouts == 1
+
+    asyncio.run(scenario())
+
+
+def test_each_acquire_restarts_timer():
+    async def scenario():
+        lock = ResourceLock(timeout=0.1)
+        await lock.acquire("a")
+        for _ in range(4):
+            await asyncio.sleep(0.06)
+            await lock.acquire("a")
+        assert lock.holder == "a" and lock.timeouts == 0
+
+    asyncio.run(scenario())
+
+
+def test_force_release_wakes_next():
+    async def scenario():
+        lock = ResourceLock(timeout=0)
+        await lock.acquire("a")
+        waiter = asyncio.ensure_future(lock.acquire("b"))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        assert await lock.force_release("a") is True
+        await asyncio.wait_for(waiter, 1)
+        assert lock.holder == "b"
+        assert await lock.force_release("a") is False
+
+    asyncio.run(scenario())
+
+
+def test_close_wakes_waiters():
+    async def scenario():
+        lock = ResourceLock(timeout=0)
+        await lock.acquire("a")
+        waiter = asyncio.ensure_future(lock.acquire("b"))
+        await asyncio.sleep(0.01)
+        lock.close()
+        await asyncio.wait_for(waiter, 1)
+        assert not lock.queue and lock.holder is None
+        # 关闭后 acquire 不再阻塞
+        await asyncio.wait_for(lock.acquire("c"), 0.1)
+
+    asyncio.run(scenario())
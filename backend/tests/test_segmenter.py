@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+
+# 添加项目根路径
+sys.path.append(str(Path(__file__).parent.parent))
+from core.util.segmenter import Segmenter
+
+
+def _segment(text: str, step: int = 1, **kwargs) -> list:
+    """模拟 LLM 流式输出：每次喂 step 个字符，最后 flush"""
+    segmenter = Segmenter(**kwargs)
+    sentences = []
+    for i in range(0, len(text), step):
+        sentences += segmenter.feed(text[i:i + step])
+    return sentences + segmenter.flush()
+
+
+def test_first_sentence_cuts_at_first_clause():
+    sentences = _segment("你好啊朋友，今天我们来聊聊天气。明天也许会下雨。", first_min_chars=4, min_chars=10)
+    assert sentences[0] == "你好啊朋友，"
+
+
+def test_first_clause_waits_for_first_min_chars():
+    assert _segment("嗯，我觉得可以。", first_min_chars=4)[0] == "嗯，我觉得可以。"
+
+
+def test_later_short_sentences_are_merged():
+    sentences = _segment("第一句话已经足够长了。好。对。这也是一句足够长的话。", first_min_chars=4, min_chars=8)
+    assert sentences == ["第一句话已经足够长了。", "好。对。这也是一句足够长的话。"]
+
+
+def test_closing_quote_stays_with_sentence():
+    sentences = _segment("她说：“今天真是美好的一天！”然后就走了出去，再也没有回来。", first_min_chars=4)
+    assert sentences[0] == "她说：“今天真是美好的一天！”"
+
+
+def test_abbreviations_are_not_sentence_ends():
+    text = "Mr. Smith met Dr. Jones at the lab today. They talked about e.g. time travel for hours."
+    assert _segment(text, first_min_chars=4, min_chars=4) == [
+        "Mr. Smith met Dr. Jones at the lab today.",
+        "They talked about e.g. time travel for hours.",
+    ]
+
+
+def test_initials_are_not_sentence_ends():
+    assert _segment("I met J. R. Tolkien once. It was great.", min_chars=3) == [
+        "I met J. R. Tolkien once.", "It was great.",
+    ]
+
+
+def test_decimal_point_is_not_a_sentence_end():
+    assert _segment("圆周率约等于3.14，这是常识。", first_min_chars=20) == ["圆周率约等于3.14，这是常识。"]
+
+
+def test_long_buffer_falls_back_to_earlier_sentence_end():
+    # 第一句太短没有切，超过 max_chars 后退回到它的句末，而不是在 max_chars 处硬切
+    text = "好的。" + "这是一个没有任何标点的非常长的句子" * 3
+    sentences = _segment(text, first_min_chars=10, min_chars=10, max_chars=30)
+    assert sentences[0] == "好的。"
+
+
+def test_long_buffer_falls_back_to_clause_then_hard_cut():
+    text = "这是一个比较长的分句，" + "后面是没有任何标点的长文本" * 4
+    sentences = _segment(text, first_min_chars=100, min_chars=5, max_chars=30)
+    assert sentences[0] == "这是一个比较长的分句，"
+    assert all(len(sentence) <= 30 for sentence in sentences)
+    assert "".join(sentences) == text
+
+
+def test_long_english_buffer_cuts_at_space():
+    text = "word " * 30
+    sentences = _segment(text, first_min_chars=1000, min_chars=1000, max_chars=40)
+    assert all(len(sentence) <= 40 for sentence in sentences)
+    assert all(not sentence.endswith("wor") for sentence in sentences)
+    assert " ".join(sentences).split() == text.split()
+
+
+def test_chunking_does_not_change_result():
+    text = "你好，我是真帆。今天的实验数据是3.14，比预期的要好很多！Mr. Smith也同意。"
+    assert _segment(text, step=1) == _segment(text, step=7) == _segment(text, step=len(text))
+
+
+def test_reset_restores_first_sentence_rule():
+    segmenter = Segmenter(first_min_chars=4, min_chars=20)
+    segmenter.feed("你好啊朋友，今天")
+    segmenter.reset()
+    assert segmenter.feed("我们再来一次，好吗") == ["我们再来一次，"]
@@ -0,0 +1,63 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加项目根路径
+sys.path.append(str(Path(__file__).parent.parent))
+from core.util.token_bucket import TokenBucket
+
+
+def test_burst_up_to_capacity_without_waiting():
+    bucket = TokenBucket(rate=10, capacity=5)
+    start = time.monotonic()
+    waits = [bucket.acquire() for _ in range(5)]
+    assert waits == [0.0] * 5
+    assert time.monotonic() - start < 0.05
+    assert bucket.waited == 0
+
+
+def test_waits_once_capacity_is_spent():
+    bucket = TokenBucket(rate=20, capacity=1)
+    bucket.acquire()
+    start = time.monotonic()
+    wait = bucket.acquire()
+    elapsed = time.monotonic() - start
+    assert 0.03 < wait <= 0.05
+    assert elapsed >= wait * 0.9
+    assert bucket.waited == wait
+
+
+def test_refills_over_time_up_to_capacity():
+    bucket = TokenBucket(rate=100, capacity=2)
+    bucket.acquire(2)
+    time.sleep(0.1)  # 足够补满 10 个，但最多积攒 capacity 个
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() > 0
+
+
+def test_default_capacity():
+    assert TokenBucket(rate=0.5).capacity == 1.0
+    assert TokenBucket(rate=8).capacity == 8
+
+
+def test_concurrent_callers_are_spaced_by_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    times = []
+    lock = threading.Lock()
+
+    def call():
+        bucket.acquire()
+        with lock:
+            times.append(time.monotonic())
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 第一个立即放行，其余 5 个按 50/s 依次放行
+    assert max(times) - start >= 5 / 50 * 0.9
+    assert bucket.waited >= sum(i / 50 for i in range(1, 6)) * 0.9
@@ -0,0 +1,155 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# 添加项目根路径
+sys.path.append(str(Path(__file__).parent.parent))
+from core.util.tts_scheduler import TTSBusyError, TTSScheduler
+
+
+class Recorder:
+    """记录合成函数的执行顺序；gate 未放行前第一个任务一直占着线程，其余任务只能排队"""
+
+    def __init__(self):
+        self.order = []
+        self.gate = threading.Event()
+
+    def blocker(self):
+        self.gate.wait(5)
+        return "gate"
+
+    def job(self, name):
+        def func():
+            self.order.append(name)
+            return name
+        return func
+
+
+def _run(scenario):
+    async def wrapped():
+        scheduler = TTSScheduler(max_concurrency=1)
+        try:
+            await scenario(scheduler, Recorder())
+        finally:
+            scheduler.close()
+    asyncio.run(wrapped())
+
+
+def test_round_robin_across_sessions():
+    async def scenario(scheduler, rec):
+        gate = scheduler.submit("gate", rec.blocker)
+        futures = [scheduler.submit("a", rec.job(f"a{i}")) for i in range(3)]
+        futures += [scheduler.submit("b", rec.job(f"b{i}")) for i in range(2)]
+        rec.gate.set()
+        await asyncio.gather(gate, *futures)
+        assert rec.order == ["a0", "b0", "a1", "b1", "a2"]
+
+    _run(scenario)
+
+
+def test_priority_order_within_session():
+    async def scenario(scheduler, rec):
+        gate = scheduler.submit("gate", rec.blocker)
+        futures = [
+            scheduler.submit("a", rec.job("last")),
+            scheduler.submit("a", rec.job("r2s0"), priority=(2, 0)),
+            scheduler.submit("a", rec.job("r1s1"), priority=(1, 1)),
+            scheduler.submit("a", rec.job("r1s0"), priority=(1, 0)),
+        ]
+        rec.gate.set()
+        await asyncio.gather(gate, *futures)
+        assert rec.order == ["r1s0", "r1s1", "r2s0", "last"]
+
+    _run(scenario)
+
+
+def test_result_and_exception_are_forwarded():
+    async def scenario(scheduler, rec):
+        assert await scheduler.run("a", lambda: 42) == 42
+
+        def boom():
+            raise ValueError("boom")
+        with pytest.raises(ValueError):
+            await scheduler.run("a", boom)
+        assert scheduler.stats()["completed"] == 2
+
+    _run(scenario)
+
+
+def test_cancelled_jobs_do_not_run_or_count():
+    async def scenario(scheduler, rec):
+        scheduler.max_pending_per_session = 2
+        gate = scheduler.submit("gate", rec.blocker)
+        first = scheduler.submit("a", rec.job("a0"))
+        second = scheduler.submit("a", rec.job("a1"))
+        first.cancel()
+        # 被取消的任务在准入检查前清掉，不再占用会话配额
+        third = scheduler.submit("a", rec.job("a2"))
+        assert scheduler.stats()["pending"] == 2
+
+        rec.gate.set()
+        await asyncio.gather(gate, second, third)
+        assert rec.order == ["a1", "a2"]
+        assert scheduler.stats()["pending"] == 0
+        assert scheduler.stats()["sessions_waiting"] == 0
+
+    _run(scenario)
+
+
+def test_per_session_limit():
+    async def scenario(scheduler, rec):
+        scheduler.max_pending_per_session = 2
+        gate = scheduler.submit("gate", rec.blocker)
+        futures = [scheduler.submit("a", rec.job(f"a{i}")) for i in range(2)]
+        with pytest.raises(TTSBusyError):
+            scheduler.submit("a", rec.job("a2"))
+        # 其他会话不受影响
+        futures.append(scheduler.submit("b", rec.job("b0")))
+        assert scheduler.stats()["rejected"] == 1
+
+        rec.gate.set()
+        await asyncio.gather(gate, *futures)
+        assert sorted(rec.order) == ["a0", "a1", "b0"]
+
+    _run(scenario)
+
+
+def test_global_limit():
+    async def scenario(scheduler, rec):
+        scheduler.max_pending = 3
+        gate = scheduler.submit("gate", rec.blocker)
+        futures = [scheduler.submit(session, rec.job(session)) for session in ("a", "b", "c")]
+        with pytest.raises(TTSBusyError):
+            scheduler.submit("d", rec.job("d"))
+
+        rec.gate.set()
+        await asyncio.gather(gate, *futures)
+        # 排队的任务执行完后又可以接收新任务
+        assert await scheduler.run("d", rec.job("d")) == "d"
+
+    _run(scenario)
+
+
+def test_max_per_model():
+    async def scenario(scheduler, rec):
+        scheduler.close()
+        scheduler = TTSScheduler(max_concurrency=2, max_per_model=1)
+        try:
+            gate = scheduler.submit("gate", rec.blocker, model="x")
+            # 模型 x 已满，同会话中优先级更高的 x 任务要等，y 任务先启动
+            queued_x = scheduler.submit("a", rec.job("x"), priority=0, model="x")
+            other = scheduler.submit("a", rec.job("y"), priority=1, model="y")
+            await asyncio.wait_for(other, 1)
+            assert rec.order == ["y"] and not queued_x.done()
+            assert scheduler.stats()["running_by_model"] == {"x": 1}
+
+            rec.gate.set()
+            await asyncio.gather(gate, queued_x)
+            assert rec.order == ["y", "x"]
+        finally:
+            scheduler.close()
+
+    _run(scenario)
@@ -3,6 +3,13 @@ import config from '../config.json'
 type MessageHandler = (data: any) => void
 type EventHandler = () => void
 
+// 二进制帧协议，与后端 core/handler/protocol.py 保持一致
+// 帧头(大端): 类型(1) 标志(1) 序号(4) 角色名长度(1)，随后是角色名和音频数据
+const FRAME_AUDIO_OUT = 1
+const FRAME_AUDIO_IN = 2
+const FLAG_FINAL = 0x01
+const HEADER_SIZE = 7
+
 // WebSocket通信封装类，支持事件/消息回调注册
 export class MahoWebSocket {
   private ws: WebSocket | null = null
@@ -10,6 +17,7 @@ export class MahoWebSocket {
   private reconnectTimer: number | null = null
   private messageHandlers: Map<string, MessageHandler[]> = new Map()
   private eventHandlers: Map<string, EventHandler[]> = new Map()
+  private binary = false // 是否已与后端协商二进制音频帧
 
   constructor() {
     this.url = `ws://${config.ip}:8080/ws`
@@ -19,6 +27,8 @@ export class MahoWebSocket {
   // 建立WebSocket连接
   private connect() {
     this.ws = new WebSocket(this.url)
+    this.ws.binaryType = 'arraybuffer'
+    this.binary = false
     this.bindEvents()
   }
 
@@ -28,6 +38,13 @@ export class MahoWebSocket {
 
     this.ws.onopen = () => {
       console.log('WebSocket连接已建立', this.ws?.url)
+      // 协商二进制音频帧与音频输出格式，token 只在握手时发送一次
+      this.ws?.send(JSON.stringify({
+        type: 'hello',
+        binary: true,
+        audio: config.audio,
+        token: localStorage.getItem('token')
+      }))
       this.triggerEvent('open') // 触发open事件回调
       if (this.reconnectTimer) {
         clearInterval(this.reconnectTimer)
@@ -36,8 +53,15 @@ export class MahoWebSocket {
     }
 
     this.ws.onmessage = (event) => {
+      if (event.data instanceof ArrayBuffer) {
+        this.handleBinary(event.data)
+        return
+      }
       try {
         const msg = JSON.parse(event.data)
+        if (msg.type === 'hello') {
+          this.binary = !!msg.binary
+        }
         this.triggerMessage(msg.type, msg) // 按type分发消息
       } catch (e) {
         console.error('WS消息解析失败', e)
@@ -77,6 +101,34 @@ export class MahoWebSocket {
     }
   }
 
+  // 发送二进制音频帧（仅在协商成功后可用，否则返回 false 由调用方回退到 JSON）
+  public sendAudio(pcm: Uint8Array, isFinal: boolean): boolean {
+    if (!this.binary || !this.ws || this.ws.readyState !== WebSocket.OPEN) return false
+    const frame = new Uint8Array(HEADER_SIZE + pcm.byteLength)
+    const view = new DataView(frame.buffer)
+    view.setUint8(0, FRAME_AUDIO_IN)
+    view.setUint8(1, isFinal ? FLAG_FINAL : 0)
+    frame.set(pcm, HEADER_SIZE)
+    this.ws.send(frame)
+    return true
+  }
+
+  // 解析二进制音频帧，按与 JSON 音频消息相同的结构分发；data 直接是音频字节（Uint8Array），不再转成 Base64
+  private handleBinary(buffer: ArrayBuffer) {
+    if (buffer.byteLength < HEADER_SIZE) return
+    const view = new DataView(buffer)
+    if (view.getUint8(0) !== FRAME_AUDIO_OUT) return
+    const nameLen = view.getUint8(6)
+    if (buffer.byteLength < HEADER_SIZE + nameLen) return
+    const character = new TextDecoder().decode(new Uint8Array(buffer, HEADER_SIZE, nameLen))
+    this.triggerMessage('audio', {
+      type: 'audio',
+      character,
+      data: new Uint8Array(buffer, HEADER_SIZE + nameLen),
+      is_final: (view.getUint8(1) & FLAG_FINAL) !== 0
+    })
+  }
+
   /**
    * 注册事件/消息回调
    * @param event 事件名（open/close/error/text/audio等）
@@ -93,13 +93,18 @@ export const useDirectorStore = defineStore('director', () => {
   // --- 演出逻辑实现 ---
 
   // 音频播放逻辑：使用循环代替递归，逻辑更清晰
+  // 流式合成的一句话会分成多段音频：每段解码后排在上一段之后无缝播放，
+  // 下一段在当前段播放期间解码，分片衔接处没有间隙；最多提前排一段，打断时只需撤下这一段
   const playNextAudio = async (act: any) => {
+    let playing: Promise<void> | null = null
     while (currentProcessingId === act.uniqueId) {
       if (audioIndex < act.audioChunks.length) {
         const chunk = act.audioChunks[audioIndex++]
         try {
-          // 调用 AudioStore 统一播放接口，处理音频解码、播放及口型同步
-          await audioStore.play(chunk.data, act.characterId)
+          // 调用 AudioStore 统一播放接口，处理音频解码、排播及口型同步
+          const { ended } = await audioStore.enqueue(chunk.data, act.characterId)
+          if (playing) await playing
+          playing = ended
         } catch (err) {
           console.warn('音频播放失败:', err)
         }
@@ -107,10 +112,12 @@ export const useDirectorStore = defineStore('director', () => {
         // 缓冲区空了但还没结束，等一等新数据
         await new Promise(resolve => setTimeout(resolve, 100))
       } else {
-        // 数据已经全部传完且播完
+        // 数据已经全部传完
         break
       }
     }
+    // 等最后一段播完
+    if (playing) await playing
 
     // 播放结束后的状态标记
     if (currentProcessingId === act.uniqueId) {
@@ -202,8 +209,9 @@ export const useDirectorStore = defineStore('director', () => {
       typeInterval = null
     }
     
-    // 3. 清空演出队列（后续待播放的内容被移除）
+    // 3. 清空演出队列（后续待播放的内容被移除），撤下已排好但还没开始的音频
     performanceStore.clearQueue()
+    audioStore.stopPending()
     currentProcessingId = null
     
     // 4. 重置状态标记
@@ -10,30 +10,55 @@ export const useAudioStore = defineStore('audio', () => {
   const mouthOpen = ref(0) // 嘴巴张开程度 0-1
   const speakingCharacterId = ref<string | null>(null)
 
+  const syncMouth = (characterId: string) => (volume: number) => {
+    mouthOpen.value = volume
+    if (characterId) {
+      stageStore.updateCharacterTransform(characterId, { mouthOpen: volume })
+    }
+  }
+
+  const resetMouth = (characterId: string) => {
+    // 后面还有排好的音频时不复位，避免句中分片衔接处口型和说话人闪烁
+    if (player.isPlaying()) return
+    mouthOpen.value = 0
+    speakingCharacterId.value = null
+    if (characterId) {
+      stageStore.updateCharacterTransform(characterId, { mouthOpen: 0 })
+    }
+  }
+
   /**
-   * 播放音频并同步口型
+   * 播放音频并同步口型（二进制帧收到的是原始字节，JSON 消息仍是 Base64）
    */
-  const play = async (base64Data: string, characterId: string) => {
+  const play = async (data: string | Uint8Array, characterId: string) => {
+    const { ended } = await enqueue(data, characterId)
+    await ended
+  }
+
+  /**
+   * 解码音频并排在已排入的音频之后无缝播放，解码完成即返回；
+   * ended 在这一段播放结束时完成。调用方可以在这一段播放期间解码下一段，分片之间没有间隙。
+   */
+  const enqueue = async (data: string | Uint8Array, characterId: string) => {
+    const audioBuffer = await player.decode(data)
     speakingCharacterId.value = characterId
-    try {
-      await player.playBase64(base64Data, (volume) => {
-        mouthOpen.value = volume
-        if (characterId) {
-          stageStore.updateCharacterTransform(characterId, { mouthOpen: volume })
-        }
-      })
-    } finally {
-      mouthOpen.value = 0
-      speakingCharacterId.value = null
-      if (characterId) {
-        stageStore.updateCharacterTransform(characterId, { mouthOpen: 0 })
-      }
-    }
+    const ended = player.schedule(audioBuffer, syncMouth(characterId))
+      .finally(() => resetMouth(characterId))
+    return { ended }
+  }
+
+  /**
+   * 撤下已排入但尚未开始的音频（打断时使用，正在播放的一段照常播完）
+   */
+  const stopPending = () => {
+    player.stopPending()
   }
 
   return {
     mouthOpen,
     speakingCharacterId,
-    play
+    play,
+    enqueue,
+    stopPending
   }
 })
@@ -93,8 +93,10 @@ export const useVADStore = defineStore('vad', () => {
           pcmData[i] = s < 0 ? s * 0x8000 : s * 0x7FFF
         }
 
-        // 转换为 Base64 并发送分片
+        // 优先以二进制帧发送，未协商时回退为 Base64 JSON
         const uint8Array = new Uint8Array(pcmData.buffer)
+        if (wsStore.wsClient.sendAudio(uint8Array, false)) return
+
         let binary = ''
         for (let i = 0; i < uint8Array.byteLength; i++) {
           binary += String.fromCharCode(uint8Array[i])
@@ -127,12 +129,14 @@ export const useVADStore = defineStore('vad', () => {
           stopRecording()
 
           // 发送结束标志
-          wsStore.send({
-            type: 'audio',
-            data: '',
-            is_final: true,
-            token: localStorage.getItem('token')
-          })
+          if (!wsStore.wsClient.sendAudio(new Uint8Array(0), true)) {
+            wsStore.send({
+              type: 'audio',
+              data: '',
+              is_final: true,
+              token: localStorage.getItem('token')
+            })
+          }
 
           onVoiceEnd.value?.()
         }
@@ -3,10 +3,25 @@ import { ref, computed } from 'vue'
 import { useWSStore } from './modules/ws'
 
 export interface AudioChunk {
-  data: string // base64
+  data: string | Uint8Array // JSON 消息为 Base64，二进制帧为原始字节
   is_final: boolean
 }
 
+// 合并同一句话的音频分片：二进制分片拼成一段字节，Base64 分片直接拼接字符串
+const mergeAudio = (parts: (string | Uint8Array)[]): string | Uint8Array => {
+    if (parts.every(part => typeof part === 'string')) {
+        return parts.join('') // 后端按30k切分(3的倍数)，直接拼接安全
+    }
+    const bytes = parts as Uint8Array[]
+    const merged = new Uint8Array(bytes.reduce((size, part) => size + part.byteLength, 0))
+    let offset = 0
+    for (const part of bytes) {
+        merged.set(part, offset)
+        offset += part.byteLength
+    }
+    return merged
+}
+
 /**
  * 演出片段：存储一次完整对话的所有流式数据
  * 仅作为底层数据缓冲，不包含播放逻辑
@@ -74,7 +89,7 @@ export const usePerformanceStore = defineStore('performance', () => {
     })
 
     // 临时缓冲区：用于拼接同一句话的音频分片
-    let audioBuffer: string[] = []
+    let audioBuffer: (string | Uint8Array)[] = []
 
     wsStore.wsClient.on('audio', (msg: any) => {
          const receiver = tailPerformance.value
@@ -84,9 +99,8 @@ export const usePerformanceStore = defineStore('performance', () => {
              
              // 如果是本次音频流的最后一帧，则合并为一个可播放单元
              if (msg.is_final) {
-                 const fullBase64 = audioBuffer.join('') // 后端按30k切分(3的倍数)，直接拼接安全
                  receiver.audioChunks.push({
-                     data: fullBase64,
+                     data: mergeAudio(audioBuffer),
                      is_final: true
                  })
                  audioBuffer = [] // 清空缓冲
@@ -100,7 +114,7 @@ export const usePerformanceStore = defineStore('performance', () => {
              // 如果还有残留的音频缓冲（防御性代码），强制合并
              if (audioBuffer.length > 0) {
                   receiver.audioChunks.push({
-                      data: audioBuffer.join(''),
+                      data: mergeAudio(audioBuffer),
                       is_final: true
                   })
                   audioBuffer = []
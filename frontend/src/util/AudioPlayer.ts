@@ -4,70 +4,131 @@ export class AudioPlayer {
   private dataArray: Uint8Array
   private animationId: number | null = null
 
+  // 无缝排播：下一段的开始时间，以及已排入但尚未播完的音源
+  private nextStartTime = 0
+  private sources = new Map<AudioBufferSourceNode, number>() // 音源 -> 开始时间
+  private onProgress?: (volume: number) => void
+
   constructor(context?: AudioContext) {
     this.context = context || new (window.AudioContext || (window as any).webkitAudioContext)()
     this.analyser = this.context.createAnalyser()
     this.analyser.fftSize = 256
     this.dataArray = new Uint8Array(this.analyser.frequencyBinCount)
+    this.analyser.connect(this.context.destination)
   }
 
   /**
    * 播放 Base64 编码的音频，并提供实时音量回调
    */
   public async playBase64(
-    base64Data: string, 
+    base64Data: string,
     onProgress?: (volume: number) => void
   ): Promise<void> {
-    // 1. 解码
-    const binaryString = window.atob(base64Data)
-    const len = binaryString.length
-    const bytes = new Uint8Array(len)
-    for (let i = 0; i < len; i++) {
-        bytes[i] = binaryString.charCodeAt(i)
-    }
-    
-    // 2. 转换为 AudioBuffer
-    const audioBuffer = await this.context.decodeAudioData(bytes.buffer)
+    return this.playBytes(this.base64ToBytes(base64Data), onProgress)
+  }
 
-    // 3. 播放
-    return new Promise((resolve) => {
-      const source = this.context.createBufferSource()
-      source.buffer = audioBuffer
-      
-      source.connect(this.analyser)
-      this.analyser.connect(this.context.destination)
+  /**
+   * 播放音频文件字节（如 WAV），并提供实时音量回调
+   */
+  public async playBytes(
+    bytes: Uint8Array,
+    onProgress?: (volume: number) => void
+  ): Promise<void> {
+    return this.schedule(await this.decode(bytes), onProgress)
+  }
 
-      const updateVolume = () => {
-        this.analyser.getByteFrequencyData(this.dataArray)
-        let sum = 0
-        for (let i = 0; i < this.dataArray.length; i++) {
-          sum += this.dataArray[i]
-        }
-        const average = sum / this.dataArray.length
-        
-        // 映射到 0-1 的口型数值，增加一点灵敏度
-        const threshold = 10
-        let value = 0
-        if (average > threshold) {
-          value = Math.min(1, ((average - threshold) / (255 - threshold)) * 3.0)
-        }
-        
-        onProgress?.(value)
-        this.animationId = requestAnimationFrame(updateVolume)
-      }
+  /**
+   * 把音频文件（Base64 或原始字节）解码为 AudioBuffer
+   */
+  public async decode(data: string | Uint8Array): Promise<AudioBuffer> {
+    const bytes = typeof data === 'string' ? this.base64ToBytes(data) : data
+    // decodeAudioData 会占用传入的 buffer，视图只覆盖一部分时复制出来
+    const buffer = bytes.byteOffset === 0 && bytes.byteLength === bytes.buffer.byteLength
+      ? bytes.buffer
+      : bytes.slice().buffer
+    return this.context.decodeAudioData(buffer as ArrayBuffer)
+  }
+
+  /**
+   * 把解码好的音频排在上一段之后无缝播放（同一个 AudioContext 的时间轴上首尾相接），
+   * 返回这一段播放结束时完成的 Promise。前面没有在播的音频时立即开始。
+   */
+  public schedule(
+    audioBuffer: AudioBuffer,
+    onProgress?: (volume: number) => void
+  ): Promise<void> {
+    const source = this.context.createBufferSource()
+    source.buffer = audioBuffer
+    source.connect(this.analyser)
+
+    const startAt = Math.max(this.nextStartTime, this.context.currentTime)
+    this.nextStartTime = startAt + audioBuffer.duration
+    this.sources.set(source, startAt)
+    this.onProgress = onProgress
+    if (this.animationId === null) this.updateVolume()
 
+    return new Promise((resolve) => {
       source.onended = () => {
-        if (this.animationId) cancelAnimationFrame(this.animationId)
-        onProgress?.(0)
+        this.sources.delete(source)
+        if (this.sources.size === 0) {
+          if (this.animationId !== null) cancelAnimationFrame(this.animationId)
+          this.animationId = null
+          this.onProgress?.(0)
+        }
         resolve()
       }
-
-      updateVolume()
-      source.start(0)
+      source.start(startAt)
     })
   }
 
+  /**
+   * 撤下已排入但还没开始播放的音频（正在播放的一段照常播完）
+   */
+  public stopPending() {
+    const now = this.context.currentTime
+    for (const [source, startAt] of this.sources) {
+      if (startAt > now) source.stop()
+    }
+    this.nextStartTime = now
+  }
+
+  /**
+   * 是否还有已排入但尚未播完的音频
+   */
+  public isPlaying() {
+    return this.sources.size > 0
+  }
+
   public getContext() {
     return this.context
   }
+
+  private base64ToBytes(base64Data: string): Uint8Array {
+    const binaryString = window.atob(base64Data)
+    const len = binaryString.length
+    const bytes = new Uint8Array(len)
+    for (let i = 0; i < len; i++) {
+        bytes[i] = binaryString.charCodeAt(i)
+    }
+    return bytes
+  }
+
+  private updateVolume = () => {
+    this.analyser.getByteFrequencyData(this.dataArray)
+    let sum = 0
+    for (let i = 0; i < this.dataArray.length; i++) {
+      sum += this.dataArray[i]
+    }
+    const average = sum / this.dataArray.length
+
+    // 映射到 0-1 的口型数值，增加一点灵敏度
+    const threshold = 10
+    let value = 0
+    if (average > threshold) {
+      value = Math.min(1, ((average - threshold) / (255 - threshold)) * 3.0)
+    }
+
+    this.onProgress?.(value)
+    this.animationId = requestAnimationFrame(this.updateVolume)
+  }
 }